@@ -0,0 +1,214 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pysvglabel.labelcore.SvgTemplate import SvgTemplate
+from pysvglabel.labelcore.SvgStreamWriter import SvgStreamWriter
+from pysvglabel.labelcore.SharedDefs import SharedDefs, context_shared_defs
+from pysvglabel.labelcore.common import register_namespaces
+from pysvglabel.labelcore.optimize import compact, flatten_transforms, referenced_ids
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None  # type: ignore
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_THREADS = ["M2", "M2.5", "M3", "M4"]
+_LENGTHS = ["6mm", "8mm", "10mm", "12mm", "16mm"]
+_DRIVES = ["T6", "T10", "TS8", "TS10", "H2.5", "H3"]
+_HEADS = ["PN", "CS", "BH", "SKT"]
+_SHAPES = ["circle", "oval", "rect", "star6", "tri_down"]
+_COLORS = ["#ff0000", "#00ff00", "#0000ff", "#000000"]
+
+
+def _subarray_value(i: int) -> str:
+    count = i % 4 + 1
+    return repr([(n / count, {"pos": n / count, "text": f"item {i}.{n}"}) for n in range(count)])
+
+
+# benchmark case name -> (template relative to the repository, columns, row generator),
+# where rows are unique so they aren't all served from caches
+CASES: Dict[str, Tuple[str, List[str], Callable[[int], List[str]]]] = {
+    "text": (
+        "tests/test_color.svg",
+        ["id", "description", "color"],
+        lambda i: [str(i), f"label {i}", _COLORS[i % len(_COLORS)]],
+    ),
+    "barcode": (
+        "tests/test_barcode.svg",
+        ["id", "barcode", "description", "spaced thing"],
+        lambda i: [str(i), f"B{i:06d}", f"label {i}", chr(ord("a") + i % 26)],
+    ),
+    "subtemplate": (
+        "tests/test_subsvg.svg",
+        ["shape"],
+        lambda i: [_SHAPES[i % len(_SHAPES)]],
+    ),
+    "subarray": (
+        "tests/test_subarray.svg",
+        ["index", "value"],
+        lambda i: [str(i), _subarray_value(i)],
+    ),
+    "screws": (
+        "examples/screws_40x10mm.svg",
+        ["barcode", "thread", "length", "drive", "head"],
+        lambda i: [
+            str(i),
+            _THREADS[i % len(_THREADS)],
+            _LENGTHS[i % len(_LENGTHS)],
+            _DRIVES[i % len(_DRIVES)],
+            _HEADS[i % len(_HEADS)],
+        ],
+    ),
+}
+
+
+def write_csv(filename: str, case: str, rows: int) -> None:
+    """Writes a synthetic CSV for a benchmark case."""
+    _, columns, row_fn = CASES[case]
+    with open(filename, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        for i in range(rows):
+            writer.writerow(row_fn(i))
+
+
+def _peak_rss() -> Optional[int]:
+    """Returns the peak resident set size of this process in bytes, if available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024  # bytes on macOS, KiB on Linux
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_case(case: str, csv_filename: str, shared_defs: bool, flatten: bool, compact_output: bool) -> Dict[str, Any]:
+    """Renders a CSV with a benchmark case's template as generate does (streaming each page to a file, here
+    discarded), returning its measurements."""
+    if compact_output:
+        register_namespaces()
+    start = time.perf_counter()
+    template = SvgTemplate(os.path.join(REPO_DIR, CASES[case][0]))
+    load_seconds = time.perf_counter() - start
+    skeleton_ids = referenced_ids(template.skeleton)
+
+    page_seconds: List[float] = []
+    labels = 0
+    start = time.perf_counter()
+    with open(csv_filename, newline="", encoding="utf-8") as csvfile, open(os.devnull, "wb") as sink:
+        for page in template.iter_page_tables(csv.DictReader(csvfile)):
+            page_start = time.perf_counter()
+            sheet = template.create_sheet()
+            if compact_output:
+                sheet = compact(sheet)
+            defs = SharedDefs()
+            with SvgStreamWriter(sink, sheet) as writer, context_shared_defs(defs) if shared_defs else nullcontext():
+                writer.start_group()
+                for label in template.iter_labels(page, share_static=True):
+                    if flatten:
+                        label = flatten_transforms(label, skeleton_ids)
+                    if compact_output:
+                        label = compact(label)
+                    writer.write(label)
+                writer.end_group()
+                writer.close([defs.to_element()] if defs.fragments else [])
+            page_seconds.append(time.perf_counter() - page_start)
+            labels += len(page)
+    total_seconds = time.perf_counter() - start
+    template.run_end()
+
+    return {
+        "case": case,
+        "template": CASES[case][0],
+        "rows": labels,
+        "pages": len(page_seconds),
+        "load_seconds": load_seconds,
+        "render_seconds": total_seconds,
+        "labels_per_second": labels / total_seconds if total_seconds > 0 else None,
+        "page_latency_ms": {
+            "mean": 1000 * sum(page_seconds) / len(page_seconds),
+            "p50": 1000 * _percentile(page_seconds, 0.5),
+            "p95": 1000 * _percentile(page_seconds, 0.95),
+            "max": 1000 * max(page_seconds),
+        },
+        "peak_rss_bytes": _peak_rss(),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_DIR, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.decode("utf-8").strip()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmarks rendering synthetic CSVs with the test and example templates,"
+        + " writing results as JSON. Each case runs in its own process, so peak memory is per case."
+    )
+    parser.add_argument("--cases", type=str, nargs="+", default=list(CASES.keys()), choices=list(CASES.keys()))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Rows per CSV.")
+    parser.add_argument("--output", type=str, help="JSON file to write results to, by default printed.")
+    parser.add_argument("--data_dir", type=str, help="Directory to write (and reuse) CSVs in, by default temporary.")
+    parser.add_argument("--shared_defs", action="store_true", default=False, help="As in generate.")
+    parser.add_argument("--flatten", action="store_true", default=False, help="As in generate.")
+    parser.add_argument("--compact", action="store_true", default=False, help="As in generate.")
+    parser.add_argument("--run", type=str, nargs=2, metavar=("CASE", "CSV"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run is not None:  # a single case, in a child process
+        print(json.dumps(run_case(args.run[0], args.run[1], args.shared_defs, args.flatten, args.compact)))
+        sys.exit(0)
+
+    options = [option for option in ["shared_defs", "flatten", "compact"] if getattr(args, option)]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = args.data_dir or temp_dir
+        os.makedirs(data_dir, exist_ok=True)
+        results = []
+        for size in args.sizes:
+            for case in args.cases:
+                csv_filename = os.path.join(data_dir, f"{case}_{size}.csv")
+                if not os.path.exists(csv_filename):
+                    write_csv(csv_filename, case, size)
+                command = [sys.executable, "-m", "benchmarks.benchmark", "--run", case, csv_filename]
+                command.extend(f"--{option}" for option in options)
+                output = subprocess.run(command, cwd=REPO_DIR, stdout=subprocess.PIPE, check=True).stdout
+                result = json.loads(output)
+                print(
+                    f"{case} x {size}: {result['labels_per_second']:.0f} labels/s,"
+                    + f" {result['page_latency_ms']['p50']:.1f} ms/page (p50),"
+                    + f" peak RSS {(result['peak_rss_bytes'] or 0) / 1024 / 1024:.0f} MiB",
+                    file=sys.stderr,
+                )
+                results.append(result)
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": options,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
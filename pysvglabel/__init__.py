@@ -1,3 +1,14 @@
-from .labelcore.SvgTemplate import SvgTemplate
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .labelcore.SvgTemplate import SvgTemplate
 
 __all__ = ["SvgTemplate"]
+
+
+def __getattr__(name: str) -> Any:  # SvgTemplate is imported on first use, so subpackages can be imported alone
+    if name == "SvgTemplate":
+        from .labelcore.SvgTemplate import SvgTemplate
+
+        return SvgTemplate
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
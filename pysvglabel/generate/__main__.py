@@ -2,11 +2,120 @@ import argparse
 import csv
 import xml.etree.ElementTree as ET
 import os.path
-from typing import Optional
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import Future
+from typing import ContextManager, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 from .. import SvgTemplate
-from ..labelcore.common import INKSCAPE_NAMESPACE, SODIPODI_NAMESPACE
-from ..labelcore.InkscapeSubprocess import InkscapeSubprocess
+from ..labelcore.common import INKSCAPE_NAMESPACE, SODIPODI_NAMESPACE, XLINK_NAMESPACE, register_namespaces
+from ..labelcore.ConversionCache import ConversionCache
+from ..labelcore.InkscapePool import InkscapePool
+from ..labelcore.Manifest import Manifest
+from ..labelcore.Profiler import Profiler, context_profiler, profile_phase
+from ..labelcore.SvgCache import context_record_dependencies
+from ..labelcore.SharedDefs import SharedDefs, context_shared_defs
+from ..labelcore.SvgStreamWriter import SvgStreamWriter, document_prefixes, serialize_fragment
+from ..labelcore.optimize import compact, flatten_transforms, referenced_ids
+
+# a page rendered by a worker process, as the serialized page, its shared definitions, the files it loaded,
+# and its profiler samples
+RenderedPage = Tuple[bytes, Dict[str, ET.Element], List[str], Dict[str, List[float]]]
+
+# per-process template for page rendering workers, the ids its skeleton references, and the namespace prefixes
+# of the output documents, see iter_pages_parallel
+_worker_template: Optional[SvgTemplate] = None
+_worker_skeleton_ids: Set[str] = set()
+_worker_prefixes: Dict[str, str] = {}
+
+
+def optimize_output(elt: ET.Element, keep_ids: Set[str], flatten: bool, precision: Optional[int]) -> ET.Element:
+    """Returns elt with the requested output optimizations applied: flatten_transforms (keeping groups with ids in
+    keep_ids) if flatten is set, and compact (rounding to precision decimal places) if precision is not None."""
+    if flatten:
+        with profile_phase("generate.flatten"):
+            elt = flatten_transforms(elt, keep_ids)
+    if precision is not None:
+        with profile_phase("generate.compact"):
+            elt = compact(elt, precision)
+    return elt
+
+
+def _init_worker(template_filename: str, prefixes: Dict[str, str], compact_output: bool) -> None:
+    """Process pool initializer, loading the template (including running the init block) once per worker,
+    and registering namespaces for compact output."""
+    global _worker_template, _worker_skeleton_ids, _worker_prefixes
+    _worker_prefixes = prefixes
+    if compact_output:
+        register_namespaces()
+    _worker_template = SvgTemplate(template_filename)
+    _worker_skeleton_ids = referenced_ids(_worker_template.skeleton)
+
+
+def _render_page(
+    page_table: List[Dict[str, str]],
+    page_attrib: Dict[str, str],
+    start_slot: int,
+    shared_defs: bool,
+    flatten: bool,
+    precision: Optional[int],
+    profile: bool,
+) -> RenderedPage:
+    """Renders a page of labels (with additional attributes on the page group, starting at some slot)
+    in a worker process,
+    returning it serialized for writing by the main process (with output optimizations applied, see optimize_output),
+    its shared definitions if requested, the files it loaded, and its profiler samples if requested."""
+    assert _worker_template is not None
+    defs = SharedDefs()
+    dependencies: Set[str] = set()
+    profiler = Profiler()
+    with context_record_dependencies(dependencies), context_shared_defs(defs) if shared_defs else nullcontext(), (
+        context_profiler(profiler) if profile else nullcontext()
+    ):
+        page = _worker_template.apply_page(page_table, start_slot=start_slot, share_static=True)
+        page.attrib.update(page_attrib)
+        page = optimize_output(page, _worker_skeleton_ids, flatten, precision)
+        with profile_phase("generate.serialize"):
+            page_bytes = serialize_fragment(page, _worker_prefixes)
+    return page_bytes, defs.fragments, sorted(dependencies), profiler.samples
+
+
+def iter_pages_parallel(
+    template_filename: str,
+    pages: Iterable[Tuple[List[Dict[str, str]], Dict[str, str], int]],
+    jobs: int,
+    prefixes: Dict[str, str],
+    shared_defs: bool = False,
+    flatten: bool = False,
+    precision: Optional[int] = None,
+    profile: bool = False,
+) -> Iterator[RenderedPage]:
+    """Renders pages, as (page table, page group attributes, start slot), on a pool of worker processes,
+    yielding pages (as from apply_page) in order, serialized with the namespace prefixes (see serialize_fragment),
+    with the shared definitions they reference (see SharedDefs) if shared_defs is set, and the files they loaded.
+    Output optimizations (flatten and precision) are applied to pages as by optimize_output.
+    If profile is set, the phases of rendering each page are profiled (see Profiler) in the worker.
+    Each worker loads its own copy of the template and runs the init block. Row blocks run in the workers,
+    so their side effects are not visible in the calling process (including to the end block).
+    At most a few pages per worker are in flight at once, so page tables are still consumed lazily."""
+    from concurrent.futures import ProcessPoolExecutor  # only imported if needed, for faster startup
+
+    with ProcessPoolExecutor(
+        jobs, initializer=_init_worker, initargs=(template_filename, prefixes, precision is not None)
+    ) as executor:
+        pending: Deque["Future[RenderedPage]"] = deque()
+        for page_table, page_attrib, start_slot in pages:
+            pending.append(
+                executor.submit(
+                    _render_page, page_table, page_attrib, start_slot, shared_defs, flatten, precision, profile
+                )
+            )
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Create label sheets from SVG templates.")
@@ -31,23 +140,114 @@ if __name__ == "__main__":
         default=False,
         help="Use Inkscape's nonstandard multipage functionality, instead of writing multiple files.",
     )
+    parser.add_argument(
+        "--start_slot",
+        type=int,
+        default=0,
+        help="Label slot (in fill order, starting from 0) to start the first page at,"
+        + " to continue printing on a partially used sheet.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes to render pages with. Each worker loads the template and runs its init"
+        + " block, and row blocks run in the workers. The end block runs once in the main process,"
+        + " and does not see side effects of row blocks when more than one job is used.",
+    )
+    parser.add_argument(
+        "--inkscape_jobs",
+        type=int,
+        default=1,
+        help="Number of Inkscape processes to convert output files with, when PDF output is requested.",
+    )
+    parser.add_argument(
+        "--no_cache",
+        "--no-cache",
+        action="store_true",
+        default=False,
+        help="Always convert with Inkscape, instead of reusing PDFs cached from earlier runs for unchanged pages.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=False,
+        help="Only re-render pages whose rows, template, or loaded files changed since the last incremental run,"
+        + " as recorded in a manifest next to the output. Row blocks of unchanged pages do not run,"
+        + " so this is not suitable for templates that accumulate state across rows."
+        + " Not supported with --inkscape_multipage.",
+    )
+    parser.add_argument(
+        "--shared_defs",
+        action="store_true",
+        default=False,
+        help="Write repeated content (identical Svg and Subtemplate contents, and barcodes) once per output file"
+        + " as a shared definition, with each placement referencing it, to reduce output size.",
+    )
+    parser.add_argument(
+        "--flatten",
+        action="store_true",
+        default=False,
+        help="Reduce group nesting in the output, by folding chains of group transforms into the element they"
+        + " contain and removing groups that do nothing, which can speed up conversion and printing.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        default=False,
+        help="Write smaller output, by rounding coordinates (see --precision), using short namespace prefixes,"
+        + " and removing editor data (like Inkscape metadata) that doesn't affect rendering.",
+    )
+    parser.add_argument(
+        "--precision",
+        type=int,
+        default=3,
+        help="Decimal places to round coordinates to with --compact, in the units of the document.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        help="JSON file to write the time spent in each phase of generation to (like row blocks, text evaluation,"
+        + " each GroupReplacer class, serialization, and Inkscape conversion), as counts, totals, and percentiles.",
+    )
     args = parser.parse_args()
+    precision: Optional[int] = args.precision if args.compact else None
+    if args.compact:
+        register_namespaces()
 
     # instantiating the template messes with the system path, so abspath everything now
     csvpath = os.path.abspath(args.csv)
-    outputpath = os.path.abspath(args.output)
+    outputpath: str = os.path.abspath(args.output)
+
+    start_time = time.perf_counter()
+    profiler: Optional[Profiler] = Profiler() if args.profile else None
+
+    def profiling() -> ContextManager[None]:
+        """Returns a context in which phases are profiled, if requested."""
+        if profiler is not None:
+            return context_profiler(profiler)
+        else:
+            return nullcontext()
 
-    template = SvgTemplate(args.template)
-    template_page_count = template.get_sheet_count()[0] * template.get_sheet_count()[1]
+    with profiling(), profile_phase("generate.load_template"):
+        template = SvgTemplate(args.template)
+    skeleton_ids = referenced_ids(template.skeleton)  # elements the document may reference, see --flatten
 
-    with open(csvpath, newline="", encoding="utf-8") as csvfile:
-        reader = csv.DictReader(csvfile)
-        table = [row for row in reader]
+    def create_sheet(keep_namedview: bool = False) -> ET.Element:
+        """Returns the top-level element of an output document, compacted if requested."""
+        sheet = template.create_sheet()
+        if precision is not None:
+            sheet = compact(sheet, precision, keep_namedview)
+        return sheet
 
     output_name, output_ext = os.path.splitext(outputpath)
-    inkscape: Optional[InkscapeSubprocess] = None
+    inkscape: Optional[InkscapePool] = None
+    cache: Optional[ConversionCache] = None
     if output_ext == ".pdf":
-        inkscape = InkscapeSubprocess()
+        inkscape = InkscapePool(args.inkscape_jobs)
+        if not args.no_cache:
+            cache = ConversionCache()
+            inkscape_version = inkscape.version()
 
     if args.print:
         import win32api  # type: ignore
@@ -55,64 +255,240 @@ if __name__ == "__main__":
 
         assert output_ext == ".pdf", "PDF output required to print"
 
-    def write_file(filename: str, sheet: ET.Element) -> None:
-        outfiles = []
-        with open(filename + ".svg", "wb") as file:
-            root = ET.ElementTree(sheet)
-            root.write(file)
-            outfiles.append(filename + ".svg")
+    # conversions run in the background while later pages are rendered, and are waited on at the end
+    conversions: List[Tuple[str, "Future[str]"]] = []
+
+    def inkscape_convert(filename: str) -> "Future[str]":
+        """Starts converting a written SVG file to PDF with Inkscape, profiling the time until it completes
+        (including time queued behind other conversions)."""
+        assert inkscape is not None
+        conversion = inkscape.convert(filename + ".svg", filename + ".pdf")
+        if profiler is not None:
+            conversion_profiler, submit_time = profiler, time.perf_counter()
+            conversion.add_done_callback(
+                lambda _: conversion_profiler.record("generate.inkscape", time.perf_counter() - submit_time)
+            )
+        return conversion
+
+    def convert(filename: str) -> "Future[str]":
+        """Converts a written SVG file to PDF, reusing a cached conversion of identical contents if available."""
+        if cache is None:
+            return inkscape_convert(filename)
+
+        with profiling(), profile_phase("generate.conversion_cache"):
+            key = cache.key(filename + ".svg", inkscape_version, ".pdf")
+            cached_conversion = cache.fetch(key, filename + ".pdf")
+        if cached_conversion:
+            cached: "Future[str]" = Future()
+            cached.set_result(filename + ".pdf")
+            return cached
+        conversion = inkscape_convert(filename)
+        conversion_cache = cache
+
+        def store(conversion: "Future[str]") -> None:  # cache successful conversions as they complete
+            if conversion.exception() is None:
+                conversion_cache.store(key, conversion.result())
 
+        conversion.add_done_callback(store)
+        return conversion
+
+    def finish_file(filename: str) -> None:
+        """Converts and prints a written SVG file, as requested."""
         if inkscape:
-            inkscape.convert(filename + ".svg", filename + ".pdf")
-            outfiles.append(filename + ".pdf")
+            conversion = convert(filename)
+            if args.print:  # printing needs the converted file
+                conversion.result()
+                print(f"Wrote {filename}.svg, {filename}.pdf")
+                win32api.ShellExecute(0, "print", filename + ".pdf", f'/d:"{args.print}"', ".", 0)
+                print(f"Print to {args.print}")
+            else:
+                conversions.append((filename, conversion))
+        else:
+            print(f"Wrote {filename}.svg")
 
-        print(f'Wrote {", ".join(outfiles)}')
+    def page_attrib(page_num: int) -> Dict[str, str]:
+        """Returns additional attributes for the page group, to lay out multipage documents."""
+        if args.inkscape_multipage:
+            return {"transform": f"translate({page_num * template.sheet.page[0].to_px() * viewbox_scale_x}, 0)"}
+        else:
+            return {}
 
-        if args.print:
-            win32api.ShellExecute(0, "print", filename + ".pdf", f'/d:"{args.print}"', ".", 0)
-            print(f"Print to {args.print}")
+    def page_start_slot(page_num: int) -> int:
+        """Returns the slot the first label of a page is placed at, where only the first page may be partial."""
+        if page_num == 0:
+            return int(args.start_slot)
+        else:
+            return 0
 
-    # chunk into page-sized tables
-    page_tables = [table[start : start + template_page_count] for start in range(0, len(table), template_page_count)]
+    def write_page(
+        writer: SvgStreamWriter,
+        defs: SharedDefs,
+        page: Union[RenderedPage, List[Dict[str, str]]],
+        page_num: int,
+    ) -> Set[str]:
+        """Writes a page, either already rendered by a worker process or as a page table to render,
+        in which case each label is written as soon as it is rendered.
+        Shared definitions referenced by the page are collected into defs. Returns the files the page loaded."""
+        if isinstance(page, tuple):
+            page_bytes, page_defs, page_dependencies, page_samples = page
+            writer.write_bytes(page_bytes)
+            if profiler is not None:
+                profiler.update(page_samples)
+            defs.update(page_defs)
+            return set(page_dependencies)
+        else:
+            dependencies: Set[str] = set()
+            writer.start_group(page_attrib(page_num))
+            with context_record_dependencies(dependencies), (
+                context_shared_defs(defs) if args.shared_defs else nullcontext()
+            ):
+                for label in template.iter_labels(page, start_slot=page_start_slot(page_num), share_static=True):
+                    label = optimize_output(label, skeleton_ids, args.flatten, precision)
+                    with profile_phase("generate.serialize"):
+                        writer.write(label)
+            writer.end_group()
+            return dependencies
 
+    def trailer(defs: SharedDefs) -> List[ET.Element]:
+        """Returns the shared definitions to write at the end of a document, if any."""
+        if defs.fragments:  # definitions are referenced from labels, so their ids are kept
+            return [optimize_output(defs.to_element(), skeleton_ids.union(defs.fragments), args.flatten, precision)]
+        else:
+            return []
+
+    # output is streamed, with labels written as they are produced instead of building each document in memory,
+    # with the same namespace prefixes in all documents, so pages can be serialized before their document is opened.
+    # Labels use the namespaces of the template (even if compact removes them from the skeleton), and shared
+    # definitions are referenced with xlink:href.
+    namespaces = list(document_prefixes(template.create_sheet()))
+    if args.shared_defs:
+        namespaces.append(XLINK_NAMESPACE[1:-1])
+    prefixes = document_prefixes(create_sheet(), namespaces)
+    multipage_writer: Optional[SvgStreamWriter] = None
     if args.inkscape_multipage:
-        multipage = template.create_sheet()
+        multipage = create_sheet(keep_namedview=True)
         namedviews = multipage.findall(f"{SODIPODI_NAMESPACE}namedview")
         assert len(namedviews) == 1, f"must have exactly one sodipodi:namedview tag, got {len(namedviews)}"
         namedview = namedviews[0]
         assert len(namedview.findall(f"{INKSCAPE_NAMESPACE}page")) == 0, "namedview must be empty"
         viewbox_scale_x, viewbox_scale_y = template._viewbox_scale()
+        # the namedview is only complete once all pages are known, so it is written at the end of the document
+        multipage.remove(namedview)
+        multipage_file = open(output_name + ".svg", "wb")
+        multipage_writer = SvgStreamWriter(multipage_file, multipage, prefixes)
+        multipage_defs = SharedDefs()
 
-    for page_num, page_table in enumerate(page_tables):
-        page = template.apply_page(page_table)
+    manifest: Optional[Manifest] = None
+    if args.incremental:
+        assert not args.inkscape_multipage, "incremental regeneration requires separate page files"
+        manifest = Manifest(
+            output_name + ".manifest.json",
+            template.file_abspath,
+            {
+                "output_ext": output_ext,
+                "shared_defs": args.shared_defs,
+                "start_slot": args.start_slot,
+                "flatten": args.flatten,
+                "precision": precision,
+            },
+        )
 
-        if not args.inkscape_multipage:
-            sheet = template.create_sheet()
-            sheet.append(page)
+    def page_filename(page_num: int) -> str:
+        """Returns the output filename (without extension) of a page, when pages are written to separate files."""
+        if page_num == 0:
+            return output_name  # first page doesn't need an extension
+        else:
+            return output_name + f"_{page_num + 1}"
 
-            if page_num == 0:
-                filename = output_name  # first page doesn't need an extension
-            else:
-                filename = output_name + f"_{page_num + 1}"
-            write_file(filename, sheet)
+    def page_outputs(filename: str) -> List[str]:
+        if inkscape:
+            return [filename + ".svg", filename + ".pdf"]
         else:
-            assert "transform" not in page.attrib
-            page.attrib["transform"] = f"translate({page_num * template.sheet.page[0].to_px() * viewbox_scale_x}, 0)"
-            multipage.append(page)
+            return [filename + ".svg"]
 
-            namedview_page = ET.Element(f"{INKSCAPE_NAMESPACE}page")
-            namedview_page.attrib["x"] = str(page_num * template.sheet.page[0].to_px() * viewbox_scale_x)
-            namedview_page.attrib["y"] = "0"
-            namedview_page.attrib["width"] = str(template.sheet.page[0].to_px() * viewbox_scale_x)
-            namedview_page.attrib["height"] = str(template.sheet.page[1].to_px() * viewbox_scale_y)
-            namedview.append(namedview_page)
+    rows_hashes: Dict[int, str] = {}  # by page number, for pages to be recorded in the manifest
 
-            print(f"Generate page {page_num}")
+    def iter_stale_pages(page_tables: Iterable[List[Dict[str, str]]]) -> Iterator[Tuple[int, List[Dict[str, str]]]]:
+        """Yields pages to render as (page number, page table), skipping pages unchanged since the last run
+        in incremental mode."""
+        for page_num, page_table in enumerate(page_tables):
+            if manifest is not None:
+                filename = page_filename(page_num)
+                rows_hash = manifest.rows_hash(page_num, page_table)
+                if manifest.is_current(os.path.basename(filename), rows_hash, page_outputs(filename)):
+                    print(f"Unchanged {filename}.svg")
+                    continue
+                rows_hashes[page_num] = rows_hash
+            yield page_num, page_table
 
-    if args.inkscape_multipage:
-        write_file(output_name, multipage)
+    # rows are read lazily and chunked into page-sized tables, so only one page of the CSV is in memory at a time
+    with open(csvpath, newline="", encoding="utf-8") as csvfile, profiling():
+        stale_pages = iter_stale_pages(template.iter_page_tables(csv.DictReader(csvfile), args.start_slot))
+        pages: Iterable[Tuple[int, Union[RenderedPage, List[Dict[str, str]]]]] = stale_pages
+        if args.jobs > 1:
+            page_nums: Deque[int] = deque()  # of pages submitted to workers, which are returned in order
 
-    template.run_end()
+            def submit_pages() -> Iterator[Tuple[List[Dict[str, str]], Dict[str, str], int]]:
+                for page_num, page_table in stale_pages:
+                    page_nums.append(page_num)
+                    yield page_table, page_attrib(page_num), page_start_slot(page_num)
+
+            rendered = iter_pages_parallel(
+                template.file_abspath,
+                submit_pages(),
+                args.jobs,
+                prefixes,
+                args.shared_defs,
+                args.flatten,
+                precision,
+                profiler is not None,
+            )
+            pages = ((page_nums.popleft(), page) for page in rendered)
+        for page_num, page in pages:
+            if multipage_writer is None:
+                filename = page_filename(page_num)
+                with open(filename + ".svg", "wb") as file, SvgStreamWriter(file, create_sheet(), prefixes) as writer:
+                    defs = SharedDefs()
+                    with profile_phase("generate.page"):
+                        dependencies = write_page(writer, defs, page, page_num)
+                    writer.close(trailer(defs))
+                finish_file(filename)
+                if manifest is not None:
+                    manifest.record(
+                        os.path.basename(filename), rows_hashes.pop(page_num), dependencies, page_outputs(filename)
+                    )
+            else:
+                with profile_phase("generate.page"):
+                    write_page(multipage_writer, multipage_defs, page, page_num)
+
+                namedview_page = ET.Element(f"{INKSCAPE_NAMESPACE}page")
+                namedview_page.attrib["x"] = str(page_num * template.sheet.page[0].to_px() * viewbox_scale_x)
+                namedview_page.attrib["y"] = "0"
+                namedview_page.attrib["width"] = str(template.sheet.page[0].to_px() * viewbox_scale_x)
+                namedview_page.attrib["height"] = str(template.sheet.page[1].to_px() * viewbox_scale_y)
+                namedview.append(namedview_page)
+
+                print(f"Generate page {page_num}")
+
+    if multipage_writer is not None:
+        multipage_writer.close([namedview] + trailer(multipage_defs))
+        multipage_file.close()
+        finish_file(output_name)
+
+    for filename, conversion in conversions:
+        conversion.result()
+        print(f"Wrote {filename}.svg, {filename}.pdf")
+
+    if manifest is not None:  # only written once all outputs are, so an interrupted run re-renders everything
+        manifest.write()
+
+    with profiling(), profile_phase("generate.end_block"):
+        template.run_end()
 
     if inkscape:
         inkscape.close()
+
+    if profiler is not None:
+        profiler.record("generate.total", time.perf_counter() - start_time)
+        profiler.write(args.profile)
+        print(f"Wrote profile {args.profile}")
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from typing import List, Optional, Tuple
+
+
+def default_cache_dir() -> str:
+    """Returns the per-user cache directory for pysvglabel, following XDG conventions (or LOCALAPPDATA on Windows)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pysvglabel")
+
+
+class ConversionCache:
+    """
+    On-disk cache of converted files (eg, PDFs exported by Inkscape), keyed by the hash of the input file contents
+    and the converter version, so unchanged pages don't need to be converted again.
+
+    Entries are evicted least recently used first when the total size exceeds the limit.
+    The total is tracked as entries are stored, and the directory only rescanned when over the limit
+    (so entries stored by other processes are counted then).
+    Entries are written atomically, so this is safe to use from multiple threads and processes.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 1024 * 1024 * 1024):
+        """
+        :param directory: directory to store cached files in, by default a conversions directory in the user cache
+        :param max_bytes: maximum total size of cached files
+        """
+        if directory is None:
+            directory = os.path.join(default_cache_dir(), "conversions")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = sum(size for _, size, _ in self._entries())
+
+    @staticmethod
+    def key(filename_in: str, version: str, ext: str) -> str:
+        """Returns the cache key for converting a file, by a converter version, to some output extension."""
+        hasher = hashlib.sha256()
+        hasher.update(f"{version}\0{ext}\0".encode("utf-8"))
+        with open(filename_in, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest() + ext
+
+    def fetch(self, key: str, filename_out: str) -> bool:
+        """Copies the cached file for key to filename_out, returning whether it was cached."""
+        cached = os.path.join(self.directory, key)
+        try:
+            shutil.copyfile(cached, filename_out)
+            os.utime(cached)  # mark as recently used
+        except FileNotFoundError:
+            return False
+        return True
+
+    def store(self, key: str, filename: str) -> None:
+        """Stores a converted file in the cache under key, evicting old entries as needed."""
+        fd, temp_filename = tempfile.mkstemp(dir=self.directory, prefix=".tmp")
+        os.close(fd)
+        shutil.copyfile(filename, temp_filename)
+        size = os.path.getsize(temp_filename)
+        cached = os.path.join(self.directory, key)
+        with self._lock:
+            try:
+                replaced_size = os.path.getsize(cached)
+            except FileNotFoundError:
+                replaced_size = 0
+            os.replace(temp_filename, cached)
+            self._total_bytes += size - replaced_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """Returns the cached files, as (last used, size, path)."""
+        entries: List[Tuple[float, int, str]] = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self) -> None:
+        """Removes least recently used entries until the total size is within the limit.
+        Must be called with the lock held."""
+        entries = self._entries()
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:  # removed concurrently
+                pass
+            total_bytes -= size
+        self._total_bytes = total_bytes
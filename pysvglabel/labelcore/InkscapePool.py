@@ -0,0 +1,241 @@
+import os
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from types import TracebackType
+from typing import Deque, List, Optional, Sequence, Type
+
+
+class InkscapeError(Exception):
+    """Raised (through the conversion future) when Inkscape fails to convert a file."""
+
+    pass
+
+
+class _InkscapeJob:
+    def __init__(self, filename_in: str, filename_out: str) -> None:
+        self.filename_in = filename_in
+        self.filename_out = filename_out
+        self.future: "Future[str]" = Future()
+        self.future.set_running_or_notify_cancel()
+
+    def command(self) -> bytes:
+        return str.encode(f"file-open:{self.filename_in};export-filename:{self.filename_out};export-do;\r\n")
+
+
+class _InkscapeWorker:
+    """A single Inkscape shell process and the jobs sent to it, which it processes in order."""
+
+    def __init__(self, command: Sequence[str]) -> None:
+        self.process = subprocess.Popen(list(command), stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.pending: Deque[_InkscapeJob] = deque()  # jobs sent and not completed, the first is in progress
+        self.ready = False  # whether the startup prompt has been seen
+        self.head_time = time.monotonic()  # when the first pending job started
+        self.retired = False  # set when the worker is deliberately stopped, so its exit isn't treated as a crash
+
+    def send(self, job: _InkscapeJob) -> None:
+        assert self.process.stdin
+        if not self.pending:
+            self.head_time = time.monotonic()
+        self.pending.append(job)
+        try:
+            self.process.stdin.write(job.command())
+            self.process.stdin.flush()
+        except BrokenPipeError:  # process died, which the reader handles as a crash
+            pass
+
+
+class InkscapePool:
+    """
+    A pool of Inkscape shell processes to convert SVG to PDF (or other formats, by output extension),
+    tracking completion of each conversion.
+
+    Conversions are dispatched to the least loaded process and return futures, which complete when Inkscape prompts
+    for its next command and the output file exists.
+    Conversions that fail, time out, or whose process crashes complete with an exception,
+    and crashed or hung processes are restarted, with their other queued conversions resent to the new process.
+    If processes repeatedly fail to start (eg, a broken Inkscape install), all conversions fail instead.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        timeout: Optional[float] = 60.0,
+        command: Sequence[str] = ("inkscape", "--shell"),
+        max_start_failures: int = 3,
+    ):
+        """
+        :param workers: number of Inkscape processes
+        :param timeout: seconds a single conversion may take (including process startup) before failing, or None
+        :param command: command line to start an Inkscape shell process
+        :param max_start_failures: consecutive processes that may exit (or time out) before starting up, beyond which
+          the pool stops restarting processes and fails queued and later conversions with the last error
+        """
+        assert workers >= 1
+        self.timeout = timeout
+        self.command = command
+        self.max_start_failures = max_start_failures
+        self._lock = threading.Condition()
+        self._closed = False
+        self._start_failures = 0  # consecutive processes that exited before starting up
+        self._error: Optional[BaseException] = None  # set once processes failed to start too many times
+        self._workers: List[_InkscapeWorker] = []
+        for _ in range(workers):
+            self._workers.append(self._start_worker())
+        if timeout is not None:
+            threading.Thread(target=self._monitor, daemon=True).start()
+
+    def _start_worker(self) -> _InkscapeWorker:
+        # don't block for Inkscape to start up, commands are buffered until it is ready
+        worker = _InkscapeWorker(self.command)
+        threading.Thread(target=self._read, args=(worker,), daemon=True).start()
+        return worker
+
+    def _read(self, worker: _InkscapeWorker) -> None:
+        """Reads the output of a worker until it exits, completing a job on each prompt after the startup one."""
+        assert worker.process.stdout
+        line = b""
+        while True:
+            data = os.read(worker.process.stdout.fileno(), 4096)
+            if not data:
+                break
+            for char in data:
+                if char == ord("\n"):
+                    line = b""
+                else:
+                    line += bytes((char,))
+                    if line == b"> ":  # the shell prompt, printed at the start of a line
+                        self._prompt(worker)
+        worker.process.wait()
+        worker.process.stdout.close()
+        self._exited(worker)
+
+    def _prompt(self, worker: _InkscapeWorker) -> None:
+        with self._lock:
+            if not worker.ready:
+                worker.ready = True
+                worker.head_time = time.monotonic()
+                self._start_failures = 0
+                return
+            if not worker.pending:  # not a response to a command, eg from an error
+                return
+            job = worker.pending.popleft()
+            worker.head_time = time.monotonic()
+            self._lock.notify_all()
+        if os.path.exists(job.filename_out):
+            job.future.set_result(job.filename_out)
+        else:
+            job.future.set_exception(InkscapeError(f"Inkscape did not write {job.filename_out} from {job.filename_in}"))
+
+    def _replace(self, worker: _InkscapeWorker, exception: BaseException) -> None:
+        """Fails the in-progress job of a worker that has exited or hung, and moves its queued jobs to a new worker.
+        Must be called with the lock held."""
+        worker.retired = True
+        if not worker.ready:
+            self._start_failures += 1
+            if self._start_failures > self.max_start_failures:
+                self._fail(exception)
+                return
+        if worker.pending:
+            worker.pending.popleft().future.set_exception(exception)
+        new_worker = self._start_worker()
+        self._workers[self._workers.index(worker)] = new_worker
+        for job in worker.pending:
+            new_worker.send(job)
+        worker.pending.clear()
+        self._lock.notify_all()
+
+    def _fail(self, exception: BaseException) -> None:
+        """Stops all workers, failing their queued and in-progress jobs (and later conversions) with exception.
+        Must be called with the lock held."""
+        self._error = exception
+        for worker in self._workers:
+            worker.retired = True
+            for job in worker.pending:
+                job.future.set_exception(exception)
+            worker.pending.clear()
+            if worker.process.poll() is None:
+                worker.process.kill()
+        self._lock.notify_all()
+
+    def _exited(self, worker: _InkscapeWorker) -> None:
+        with self._lock:
+            assert worker.process.stdin
+            try:
+                worker.process.stdin.close()
+            except BrokenPipeError:
+                pass
+            if worker.retired:
+                return
+            self._replace(worker, InkscapeError(f"Inkscape exited with code {worker.process.returncode}"))
+
+    def _monitor(self) -> None:
+        """Fails conversions that have been in progress for longer than the timeout, restarting their worker."""
+        assert self.timeout is not None
+        with self._lock:
+            while not self._closed:
+                self._lock.wait(min(self.timeout, 1.0))
+                now = time.monotonic()
+                for worker in list(self._workers):
+                    if worker.pending and now - worker.head_time > self.timeout:
+                        self._replace(worker, TimeoutError(f"Inkscape conversion timed out after {self.timeout}s"))
+                        worker.process.kill()
+
+    def convert(self, filename_in: str, filename_out: str) -> "Future[str]":
+        """Starts converting a file, returning a future that completes with the output filename.
+        Any existing output file is removed first, so it can be used to check the conversion ran."""
+        if os.path.exists(filename_out):
+            os.remove(filename_out)
+        job = _InkscapeJob(os.path.abspath(filename_in), os.path.abspath(filename_out))
+        with self._lock:
+            assert not self._closed, "pool closed"
+            if self._error is not None:
+                job.future.set_exception(self._error)
+                return job.future
+            worker = min(self._workers, key=lambda worker: len(worker.pending))
+            worker.send(job)
+        return job.future
+
+    def version(self) -> str:
+        """Returns the Inkscape version string, for example to key cached conversions."""
+        result = subprocess.run(
+            [self.command[0], "--version"], stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, check=True
+        )
+        return result.stdout.decode("utf-8", errors="replace").strip()
+
+    def pending(self) -> int:
+        """Returns the number of conversions not yet completed."""
+        with self._lock:
+            return sum(len(worker.pending) for worker in self._workers)
+
+    def close(self) -> None:
+        """Waits for all conversions to complete, then stops the Inkscape processes."""
+        with self._lock:
+            while any(worker.pending for worker in self._workers):
+                self._lock.wait()
+            self._closed = True
+            self._lock.notify_all()
+            workers = list(self._workers)
+            for worker in workers:
+                worker.retired = True
+        for worker in workers:
+            assert worker.process.stdin
+            try:
+                worker.process.stdin.write(b"quit\r\n")
+                worker.process.stdin.flush()
+            except (BrokenPipeError, ValueError):  # already exited, and possibly closed by the reader
+                pass
+            worker.process.wait()
+
+    def __enter__(self) -> "InkscapePool":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
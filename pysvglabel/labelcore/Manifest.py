@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class Manifest:
+    """
+    Records the inputs of each page written by a generate run (the template and the Python modules it imports
+    from its directory, the files each page loads through SvgCache, the rows of each page, and output options),
+    so a later run can skip re-rendering pages whose inputs haven't changed.
+    Stored as JSON next to the outputs.
+
+    Files read by template code other than through SvgCache (eg, with open) are not tracked.
+    """
+
+    _VERSION = 1
+
+    def __init__(self, filename: str, template_abspath: str, options: Dict[str, Any]):
+        """
+        :param filename: manifest file, loaded if it exists, and overwritten by write
+        :param template_abspath: absolute path of the template file
+        :param options: options that affect the output, pages from runs with different options are not reused
+        """
+        self.filename = filename
+        self.template_abspath = template_abspath
+        self.options = options
+        self._file_hashes: Dict[str, Optional[str]] = {}  # current file hashes, computed at most once per run
+        self.pages: Dict[str, Dict[str, Any]] = {}  # page name -> page record, for this run
+
+        self._previous_pages: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(filename, "r", encoding="utf-8") as file:
+                previous = json.load(file)
+            # outputs may be overwritten from here on, so an interrupted run must not leave the old manifest
+            os.remove(filename)
+        except (FileNotFoundError, ValueError):
+            return
+        if (
+            previous.get("version") == self._VERSION
+            and previous.get("options") == options
+            and self._dependencies_current(previous.get("template_dependencies", {}))
+            and template_abspath in previous.get("template_dependencies", {})
+        ):
+            self._previous_pages = previous.get("pages", {})
+
+    def file_hash(self, filename: str) -> Optional[str]:
+        """Returns the hash of a file's contents, or None if it does not exist."""
+        if filename not in self._file_hashes:
+            try:
+                with open(filename, "rb") as file:
+                    self._file_hashes[filename] = hashlib.sha256(file.read()).hexdigest()
+            except FileNotFoundError:
+                self._file_hashes[filename] = None
+        return self._file_hashes[filename]
+
+    def _dependencies_current(self, dependencies: Dict[str, Optional[str]]) -> bool:
+        return all(self.file_hash(filename) == file_hash for filename, file_hash in dependencies.items())
+
+    @staticmethod
+    def rows_hash(page_num: int, table: List[Dict[str, str]]) -> str:
+        """Returns the hash of a page's rows, including its position, since rows are also numbered by position."""
+        return hashlib.sha256(json.dumps([page_num, table], sort_keys=True).encode("utf-8")).hexdigest()
+
+    def is_current(self, name: str, rows_hash: str, outputs: List[str]) -> bool:
+        """Returns whether a page (by name) was written by the previous run from the same rows and dependencies,
+        and its outputs still exist, in which case it is recorded for this run as-is."""
+        previous = self._previous_pages.get(name)
+        if (
+            previous is None
+            or previous.get("rows") != rows_hash
+            or previous.get("outputs") != outputs
+            or not all(os.path.exists(output) for output in outputs)
+            or not self._dependencies_current(previous.get("dependencies", {}))
+        ):
+            return False
+        self.pages[name] = previous
+        return True
+
+    def record(self, name: str, rows_hash: str, dependencies: Iterable[str], outputs: List[str]) -> None:
+        """Records a page written by this run."""
+        self.pages[name] = {
+            "rows": rows_hash,
+            "dependencies": {filename: self.file_hash(filename) for filename in sorted(dependencies)},
+            "outputs": outputs,
+        }
+
+    def write(self) -> None:
+        """Writes the manifest for this run. Python modules imported from the template directory by the end of the
+        run are recorded as template dependencies."""
+        template_dir = os.path.dirname(self.template_abspath)
+        template_dependencies = [self.template_abspath]
+        for module in list(sys.modules.values()):
+            module_file = getattr(module, "__file__", None)
+            if module_file and os.path.dirname(os.path.abspath(module_file)) == template_dir:
+                template_dependencies.append(os.path.abspath(module_file))
+        manifest = {
+            "version": self._VERSION,
+            "options": self.options,
+            "template_dependencies": {filename: self.file_hash(filename) for filename in template_dependencies},
+            "pages": self.pages,
+        }
+        temp_filename = self.filename + ".tmp"
+        with open(temp_filename, "w", encoding="utf-8") as file:
+            json.dump(manifest, file, indent=1)
+        os.replace(temp_filename, self.filename)
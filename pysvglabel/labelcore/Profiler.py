@@ -0,0 +1,111 @@
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from types import TracebackType
+from typing import ContextManager, Dict, Generator, List, Optional, Type
+
+
+class Profiler:
+    """
+    Collects the durations of phases of label generation (like row block execution, text evaluation,
+    and each GroupReplacer class), for finding where time goes in slow runs.
+
+    Phases are timed by profile_phase, which records to the profiler in the current context (see
+    context_profiler), and does nothing otherwise. Frequent phases (per label or element) instead check
+    current_profiler once and only take timestamps if profiling, since even a disabled context manager has
+    measurable overhead. Phases may be nested (eg, a Subtemplate's instance phases run within its group
+    replacer phase), so totals of different phases can overlap.
+    This is safe to use from multiple threads.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}  # phase -> durations in seconds
+
+    def record(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.samples.setdefault(phase, []).append(seconds)
+
+    def update(self, samples: Dict[str, List[float]]) -> None:
+        """Adds samples collected elsewhere, as from the samples of another Profiler."""
+        with self._lock:
+            for phase, durations in samples.items():
+                self.samples.setdefault(phase, []).extend(durations)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Returns the count, total time, and distribution of durations (in seconds) of each phase,
+        by descending total time."""
+        with self._lock:
+            samples = {phase: sorted(durations) for phase, durations in self.samples.items()}
+
+        def percentile(durations: List[float], fraction: float) -> float:
+            return durations[min(len(durations) - 1, int(fraction * len(durations)))]
+
+        summary = {}
+        for phase, durations in sorted(samples.items(), key=lambda item: -sum(item[1])):
+            summary[phase] = {
+                "count": len(durations),
+                "total": sum(durations),
+                "mean": sum(durations) / len(durations),
+                "p50": percentile(durations, 0.5),
+                "p90": percentile(durations, 0.9),
+                "p99": percentile(durations, 0.99),
+                "max": durations[-1],
+            }
+        return summary
+
+    def write(self, filename: str) -> None:
+        """Writes the summary as JSON."""
+        import json  # only imported if profiling, for faster startup
+
+        with open(filename, "w") as file:
+            json.dump(self.summary(), file, indent=2)
+
+
+class _PhaseTimer:
+    __slots__ = ["profiler", "phase", "start"]
+
+    def __init__(self, profiler: Profiler, phase: str) -> None:
+        self.profiler = profiler
+        self.phase = phase
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.profiler.record(self.phase, time.perf_counter() - self.start)
+
+
+_profiler: ContextVar[Optional[Profiler]] = ContextVar("profiler", default=None)
+_disabled: ContextManager[None] = nullcontext()  # reusable, so disabled phases don't allocate
+
+
+@contextmanager
+def context_profiler(profiler: Profiler) -> Generator[None, None, None]:
+    """Records phases (see profile_phase) run within this context to profiler."""
+    token = _profiler.set(profiler)
+    try:
+        yield
+    finally:
+        _profiler.reset(token)
+
+
+def current_profiler() -> Optional[Profiler]:
+    """Returns the profiler for the current context, if profiling is enabled."""
+    return _profiler.get()
+
+
+def profile_phase(phase: str, detail: Optional[str] = None) -> ContextManager[None]:
+    """Returns a context manager timing a phase (optionally broken down by detail, like a class name)
+    to the profiler of the current context, or doing nothing if profiling isn't enabled."""
+    profiler = _profiler.get()
+    if profiler is None:
+        return _disabled
+    return _PhaseTimer(profiler, phase if detail is None else f"{phase}.{detail}")
@@ -0,0 +1,81 @@
+import hashlib
+import threading
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Generator, Optional
+
+from .common import SVG_NAMESPACE, XLINK_NAMESPACE
+
+
+class SharedDefs:
+    """
+    Collects repeated content (like the same icon or barcode on many labels) into shared definitions,
+    so each distinct fragment is written once in the document's defs and every placement is a use element
+    referencing it.
+
+    Fragments are identified by a hash of their serialized content, so ids are consistent across instances
+    (eg, definitions collected in separate processes can be merged with update).
+    This is safe to use from multiple threads.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.fragments: Dict[str, ET.Element] = {}  # id -> definition, in insertion order
+
+    def use(self, elt: ET.Element) -> ET.Element:
+        """Adds elt as a definition (if its content isn't already defined) and returns a use element referencing it.
+        Any transform on elt is moved to the use element, so placements of the same content share a definition.
+        The definition takes ownership of the children of elt."""
+        definition = elt.makeelement(elt.tag, {k: v for k, v in elt.attrib.items() if k != "transform"})
+        definition.text = elt.text
+        definition.extend(list(elt))
+        # definitions are wrapped in a group, which can always be referenced (unlike eg a nested svg element)
+        wrapper = ET.Element(f"{SVG_NAMESPACE}g")
+        wrapper.append(definition)
+        def_id = "pysvglabel-" + hashlib.blake2b(ET.tostring(wrapper), digest_size=8).hexdigest()
+        with self._lock:
+            if def_id not in self.fragments:
+                wrapper.attrib["id"] = def_id
+                self.fragments[def_id] = wrapper
+
+        use_elt = ET.Element(f"{SVG_NAMESPACE}use", {f"{XLINK_NAMESPACE}href": f"#{def_id}"})
+        if "transform" in elt.attrib:
+            use_elt.attrib["transform"] = elt.attrib["transform"]
+        return use_elt
+
+    def update(self, fragments: Dict[str, ET.Element]) -> None:
+        """Adds definitions collected elsewhere, as from the fragments of another SharedDefs."""
+        with self._lock:
+            for def_id, wrapper in fragments.items():
+                self.fragments.setdefault(def_id, wrapper)
+
+    def to_element(self) -> ET.Element:
+        """Returns a defs element containing all the definitions, to be added to the document."""
+        defs = ET.Element(f"{SVG_NAMESPACE}defs")
+        with self._lock:
+            defs.extend(self.fragments.values())
+        return defs
+
+
+_shared_defs: ContextVar[Optional[SharedDefs]] = ContextVar("shared_defs", default=None)
+
+
+@contextmanager
+def context_shared_defs(defs: SharedDefs) -> Generator[None, None, None]:
+    """Temporarily collects repeated content (from Svg, Subtemplate, and barcodes) rendered in the current thread
+    (or context) into defs, restoring the previous collector afterwards."""
+    token = _shared_defs.set(defs)
+    try:
+        yield
+    finally:
+        _shared_defs.reset(token)
+
+
+def share_def(elt: ET.Element) -> ET.Element:
+    """Returns a use element referencing elt as a shared definition (see SharedDefs.use) if shared definitions are
+    being collected (see context_shared_defs), otherwise elt unchanged."""
+    defs = _shared_defs.get()
+    if defs is None:
+        return elt
+    return defs.use(elt)
@@ -0,0 +1,142 @@
+import os
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from copy import deepcopy
+from typing import Dict, Generator, Optional, Set, Tuple
+
+from .common import SVG_NAMESPACE
+from .Profiler import profile_phase
+from .SvgTemplate import SvgTemplateInstance
+
+_dependencies: ContextVar[Optional[Set[str]]] = ContextVar("dependencies", default=None)
+
+
+@contextmanager
+def context_record_dependencies(dependencies: Set[str]) -> Generator[None, None, None]:
+    """Temporarily records the absolute paths of files loaded through SvgCache (eg, by Svg and Subtemplate)
+    in the current thread (or context) into dependencies, whether or not they were already cached."""
+    token = _dependencies.set(dependencies)
+    try:
+        yield
+    finally:
+        _dependencies.reset(token)
+
+
+class _Entry:
+    """A cached file, as its parsed root, its size on disk, and its compiled template, if it was used as one."""
+
+    def __init__(self, root: ET.Element, size: int) -> None:
+        self.root = root
+        self.size = size
+        self.template: Optional[SvgTemplateInstance] = None
+
+
+class SvgCache:
+    """
+    LRU cache of parsed and validated SVG files, keyed by absolute path and modification time,
+    so files used by many labels (eg, icons in Svg and Subtemplate) are only parsed once.
+    Modified files are detected by their modification time and re-parsed.
+    Files used as subtemplates additionally have their compiled SvgTemplateInstance cached.
+
+    Limits are on the number of entries and the total size of the cached files on disk,
+    as an approximation of their parsed size.
+    This is safe to use from multiple threads.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024):
+        """
+        :param max_entries: maximum number of cached files
+        :param max_bytes: maximum total size of cached files, files larger than this are not cached
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int], _Entry]" = OrderedDict()
+        self._bytes = 0
+
+    def configure(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        """Sets new limits, evicting entries as needed."""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns cache statistics, as hits, misses, and current entries and size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._bytes}
+
+    def clear(self) -> None:
+        """Removes all entries and resets statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _evict(self) -> None:
+        """Evicts least recently used entries until within limits. Must be called with the lock held."""
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+
+    @staticmethod
+    def _load(filename: str) -> ET.Element:
+        svg = ET.parse(filename).getroot()
+        assert svg.tag == f"{SVG_NAMESPACE}svg", f"loaded file {filename} root tag is not svg, got {svg.tag}"
+        assert "width" in svg.attrib and "height" in svg.attrib, f"loaded svg {filename} missing width or height"
+        return svg
+
+    def _get_entry(self, filename: str) -> _Entry:
+        filename = os.path.abspath(filename)
+        dependencies = _dependencies.get()
+        if dependencies is not None:
+            dependencies.add(filename)
+        stat = os.stat(filename)
+        key = (filename, stat.st_mtime_ns)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = _Entry(self._load(filename), stat.st_size)  # parse outside the lock, at worst parsing twice
+        with self._lock:
+            if key not in self._entries and stat.st_size <= self.max_bytes:
+                self._entries[key] = entry
+                self._bytes += stat.st_size
+                self._evict()
+        return entry
+
+    def get_shared(self, filename: str) -> ET.Element:
+        """Returns the parsed root svg element of a SVG file, which is shared and must not be modified."""
+        return self._get_entry(filename).root
+
+    def get(self, filename: str) -> ET.Element:
+        """Returns a copy of the parsed root svg element of a SVG file, which may be freely modified."""
+        root = self.get_shared(filename)
+        with profile_phase("svg_cache.deepcopy"):
+            return deepcopy(root)
+
+    def get_template(self, filename: str) -> SvgTemplateInstance:
+        """Returns the compiled template of a SVG file, which is shared, but SvgTemplateInstance.apply_instance
+        does not modify it."""
+        entry = self._get_entry(filename)
+        template = entry.template
+        if template is None:  # racing threads at worst compile the template twice
+            template = entry.template = SvgTemplateInstance(
+                deepcopy(entry.root), os.path.dirname(os.path.abspath(filename))
+            )
+        return template
+
+
+svg_cache = SvgCache()  # process-level cache used by Svg, Subtemplate, and SubtemplateArray
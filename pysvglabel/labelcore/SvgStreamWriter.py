@@ -0,0 +1,149 @@
+import io
+import itertools
+import xml.etree.ElementTree as ET
+from types import TracebackType
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from .common import SVG_NAMESPACE
+
+
+def _namespace_uris(elt: ET.Element) -> Iterator[str]:
+    """Yields the namespaces of the tags and attributes in elt (including its descendants), possibly repeated."""
+    for node in elt.iter():
+        names = [node.tag] if isinstance(node.tag, str) else []  # comments have a factory function as tag
+        names.extend(node.keys())
+        for name in names:
+            if name[:1] == "{":
+                yield name[1:].rsplit("}", 1)[0]
+
+
+def document_prefixes(skeleton: ET.Element, namespaces: Iterable[str] = ()) -> Dict[str, str]:
+    """Returns the namespace prefixes, as uri -> prefix, declared on the top-level element of a streamed document:
+    those of the namespaces used in the skeleton and of additional namespaces (as uris) that fragments use,
+    assigned as by ElementTree (the prefix registered with ElementTree, see register_namespaces, otherwise ns0, ns1,
+    and so on)."""
+    prefixes: Dict[str, str] = {}
+    for uri in itertools.chain(_namespace_uris(skeleton), namespaces):
+        if uri not in prefixes:
+            prefix = ET._namespace_map.get(uri)  # type: ignore
+            if prefix is None:
+                prefix = f"ns{len(prefixes)}"
+            if prefix != "xml":  # the xml prefix is predefined
+                prefixes[uri] = prefix
+    return prefixes
+
+
+def serialize_fragment(elt: ET.Element, prefixes: Dict[str, str], declare: bool = False) -> bytes:
+    """Serializes an element (as ET.tostring) for a document with the namespace prefixes (as uri -> prefix) from
+    document_prefixes, which are only declared on the element if declare is set.
+    Namespaces not in prefixes are declared on the element, as ElementTree would."""
+    namespaces = dict(prefixes) if declare else {}  # declared on elt, as uri -> prefix
+    qnames: Dict[str, str] = {}
+    for node in elt.iter():
+        names = [node.tag] if isinstance(node.tag, str) else []
+        names.extend(node.keys())
+        for name in names:
+            if name in qnames:
+                continue
+            elif name[:1] != "{":
+                qnames[name] = name
+                continue
+            uri, local = name[1:].rsplit("}", 1)
+            prefix = prefixes.get(uri, namespaces.get(uri))
+            if prefix is None:
+                prefix = ET._namespace_map.get(uri)  # type: ignore
+                if prefix is None or prefix in prefixes.values() or prefix in namespaces.values():
+                    prefix = f"ns{len(prefixes) + len(namespaces)}"
+                if prefix != "xml":
+                    namespaces[uri] = prefix
+            qnames[name] = f"{prefix}:{local}" if prefix else local
+
+    # as ET.tostring, which has no way to serialize with existing prefixes
+    stream = io.BytesIO()
+    writer = io.TextIOWrapper(stream, "us-ascii", errors="xmlcharrefreplace", newline="\n")
+    ET._serialize_xml(writer.write, elt, qnames, namespaces, short_empty_elements=True)  # type: ignore
+    writer.flush()
+    writer.detach()
+    return stream.getvalue()
+
+
+class SvgStreamWriter:
+    """
+    Writes a SVG document incrementally, instead of building the entire document as an ElementTree and writing it
+    at the end.
+
+    The skeleton (top-level SVG element, like from SvgTemplate.create_sheet) is written once on construction,
+    fragments (like labels) are serialized and written as they are produced, and the document is closed by close().
+    Namespaces are declared once, on the top-level element (see document_prefixes), and fragments are serialized
+    without declaring them again.
+    """
+
+    _PLACEHOLDER = "pysvglabel-stream-placeholder"
+
+    def _split(self, elt: ET.Element, declare: bool = False) -> Tuple[bytes, bytes]:
+        """Returns the serialized opening and closing of an element, with its existing children written in the
+        opening, so new contents can be written between them. Namespaces are declared as by serialize_fragment."""
+        container = elt.makeelement(elt.tag, elt.attrib)
+        container.text = elt.text
+        container.extend(list(elt))
+        container.append(ET.Comment(self._PLACEHOLDER))
+        serialized = serialize_fragment(container, self.prefixes, declare)
+        placeholder = b"<!--" + self._PLACEHOLDER.encode() + b"-->"
+        index = serialized.index(placeholder)
+        return serialized[:index], serialized[index + len(placeholder) :]
+
+    def __init__(self, file: BinaryIO, skeleton: ET.Element, prefixes: Optional[Dict[str, str]] = None):
+        """
+        :param file: binary file to write to, which is not closed by this writer
+        :param skeleton: top-level element, written with its current children before any fragments
+        :param prefixes: namespace prefixes to declare, as uri -> prefix, by default document_prefixes(skeleton)
+        """
+        self.file = file
+        self.prefixes = document_prefixes(skeleton) if prefixes is None else prefixes
+        header, self._footer = self._split(skeleton, declare=True)
+        self.file.write(header)
+        self._open_groups: List[bytes] = []  # stack of closing tags of open groups
+        self._closed = False
+
+    def write(self, elt: ET.Element) -> None:
+        """Serializes and writes an element (including its children) at the current position in the document."""
+        self.file.write(serialize_fragment(elt, self.prefixes))
+
+    def write_bytes(self, data: bytes) -> None:
+        """Writes an already-serialized element at the current position in the document, for example a fragment
+        rendered in another process. The element must be serialized by serialize_fragment with this writer's
+        prefixes."""
+        self.file.write(data)
+
+    def start_group(self, attrib: Dict[str, str] = {}) -> None:
+        """Opens a SVG group (g element) with the given attributes, which subsequent writes are nested in
+        until the matching end_group."""
+        opening, closing = self._split(ET.Element(f"{SVG_NAMESPACE}g", attrib))
+        self.file.write(opening)
+        self._open_groups.append(closing)
+
+    def end_group(self) -> None:
+        """Closes the innermost group opened by start_group."""
+        self.file.write(self._open_groups.pop())
+
+    def close(self, trailer: List[ET.Element] = []) -> None:
+        """Closes the document, first writing trailer elements at the end of the top-level element,
+        for example content that is only complete once all fragments are written.
+        Does not close the underlying file."""
+        assert not self._open_groups, "groups not closed"
+        for elt in trailer:
+            self.write(elt)
+        self.file.write(self._footer)
+        self._closed = True
+
+    def __enter__(self) -> "SvgStreamWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if not self._closed and exc_type is None:
+            self.close()
@@ -1,9 +1,18 @@
+import ast
+import builtins
 import os.path
+import sys
+import time
 import xml.etree.ElementTree as ET
-from copy import deepcopy, copy
-from typing import Any, Dict, Callable, cast, List, Tuple, Generator
+from contextvars import ContextVar, copy_context
+from copy import deepcopy
+from itertools import islice
+from functools import lru_cache
+from types import CodeType
+from typing import Any, Dict, Callable, cast, Iterable, Iterator, List, Optional, Set, Tuple, Generator
 
 from .common import BadTemplateException, SVG_NAMESPACE, NAMESPACES, SVG_GRAPHICS_TAGS
+from .Profiler import current_profiler
 
 from contextlib import contextmanager
 
@@ -19,6 +28,29 @@ def context_chdir(path: str) -> Generator[None, None, None]:
         os.chdir(original_cwd)
 
 
+_template_dir: ContextVar[Optional[str]] = ContextVar("template_dir", default=None)
+
+
+@contextmanager
+def context_template_dir(path: str) -> Generator[None, None, None]:
+    """Temporarily sets the directory relative paths are resolved against (see resolve_path), restoring it afterwards.
+    Unlike context_chdir, this is local to the current thread (or context) and does not affect the os cwd."""
+    token = _template_dir.set(path)
+    try:
+        yield
+    finally:
+        _template_dir.reset(token)
+
+
+def resolve_path(filename: str) -> str:
+    """Returns the absolute path of a filename, with relative paths resolved against the directory of the template
+    currently being executed, or the os cwd if none."""
+    dir_abspath = _template_dir.get()
+    if dir_abspath is None:
+        return os.path.abspath(filename)
+    return os.path.normpath(os.path.join(dir_abspath, filename))
+
+
 def get_text_of(elt: ET.Element) -> str:
     inner_texts = [get_text_of(child) for child in filter_text_inner_elts(list(elt))]
     return (elt.text or "") + "".join(inner_texts)
@@ -54,23 +86,95 @@ def visit(elt: ET.Element, fn: Callable[[ET.Element], None]) -> None:
         visit(child, fn)
 
 
+def fstring_source(text: str) -> str:
+    """Returns template text as Python f-string expression source."""
+    return f'f"""{text}"""'  # TODO proper escaping, though """ in a label is unlikely
+
+
+@lru_cache(maxsize=1024)
+def compile_fstring(text: str) -> CodeType:
+    """Compiles template text as a Python f-string expression, evaluating to the substituted string."""
+    return compile(fstring_source(text), "<template text>", "eval")
+
+
+# attributes of the builtins module (as opposed to builtin names), not copied into template environments
+_MODULE_ATTRIBUTES = {"__name__", "__doc__", "__package__", "__loader__", "__spec__"}
+
+
+class _TemplateEnv(Dict[str, Any]):
+    """Template environment, including the builtins (so it can be the builtins of layered environments, see
+    _layer_env), where labelfrontend names (as if star-imported) are looked up on first use if not otherwise defined,
+    so frontend modules are only imported if a template uses them."""
+
+    def __init__(self) -> None:
+        super().__init__((key, value) for key, value in vars(builtins).items() if key not in _MODULE_ATTRIBUTES)
+
+    def __missing__(self, name: str) -> Any:
+        from .. import labelfrontend
+
+        if name not in labelfrontend.__all__:
+            raise KeyError(name)
+        value = self[name] = getattr(labelfrontend, name)  # cached, so later lookups are regular dict lookups
+        return value
+
+
+@lru_cache(maxsize=64)
+def identifier_columns(columns: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Returns the columns of a table header that are legal Python variable names, and so are defined in row
+    environments (others are only accessible through row)."""
+    return tuple(column for column in columns if column.isidentifier())
+
+
+def is_constant_fstring(text: str) -> bool:
+    """Returns whether template text has no substitutions, so evaluating it does not depend on the environment."""
+    body = ast.parse(fstring_source(text), mode="eval").body
+    return isinstance(body, ast.JoinedStr) and all(isinstance(value, ast.Constant) for value in body.values)
+
+
+def compile_command(text: str) -> CodeType:
+    """Compiles the contents of a 🐍 textbox (minus the 🐍) as a Python expression."""
+    return compile(text, "<template 🐍>", "eval")
+
+
 class SvgTemplate:
     """Class that defines a SVG sheet template, including init block, per-row blocks, and end block.
 
-    Template code is executed in the template's directory using a temporary os.chdir.
+    Filenames in template code (eg, for Svg and Subtemplate) are resolved relative to the template's directory,
+    and the template's directory is added to the Python path so supporting modules can be imported.
+    Rendering does not change the os cwd, so labels can be rendered from multiple threads.
+    The init and end blocks, which run once, are additionally executed in the template's directory
+    using a temporary os.chdir.
     """
 
     @staticmethod
     def _create_env(dir_abspath: str) -> Dict[str, Any]:
-        """Creates an environment for a template in some directory."""
-        env: Dict[str, Any] = {}
-        dirpath_escaped = dir_abspath.replace("\\", "\\\\")
-        with context_chdir(dir_abspath):
-            exec("from pysvglabel.labelfrontend import *", env)
-            exec("import sys as __sys", env)
-            exec(f"__sys.path.append('{dirpath_escaped}')", env)
+        """Creates an environment for a template in some directory, with the labelfrontend names available."""
+        env = _TemplateEnv()
+        if dir_abspath not in sys.path:
+            sys.path.append(dir_abspath)
         return env
 
+    @staticmethod
+    def _layer_env(base_env: Dict[str, Any], overlay: Dict[str, Any]) -> Dict[str, Any]:
+        """Returns an environment with the overlay variables defined on top of a base environment (from _create_env),
+        without copying the base environment: names not defined in the layer are looked up in the base environment,
+        which is the layer's builtins. Variables set by code run in the layer are set in the layer only."""
+        env: Dict[str, Any] = {"__builtins__": base_env}
+        env.update(overlay)
+        return env
+
+    _subtemplate_envs: Dict[str, Dict[str, Any]] = {}  # base environments by directory, see subtemplate_env
+
+    @classmethod
+    def subtemplate_env(cls, dir_abspath: str, overlay: Dict[str, Any]) -> Dict[str, Any]:
+        """Returns an environment for a subtemplate in some directory, with the overlay variables defined.
+        The base environment is created once per directory, and each call returns a new layer on it with the overlay,
+        so variable changes aren't reflected in other instances."""
+        base_env = cls._subtemplate_envs.get(dir_abspath)
+        if base_env is None:
+            base_env = cls._subtemplate_envs[dir_abspath] = cls._create_env(dir_abspath)
+        return cls._layer_env(base_env, overlay)
+
     def __init__(self, filename: str):
         from ..labelfrontend import LabelSheet
 
@@ -79,8 +183,8 @@ class SvgTemplate:
         root = ET.parse(filename)
         self.env: Dict[str, Any] = cast(Any, None)
         self.sheet: LabelSheet = cast(Any, None)
-        self.row_contents: List[str] = []
-        self.end_contents: List[str] = []
+        self.row_codes: List[CodeType] = []
+        self.end_codes: List[CodeType] = []
 
         newroot = deepcopy(root.getroot())
 
@@ -93,7 +197,7 @@ class SvgTemplate:
                             "multiple starting blocks (textboxes starting with '# pysvglabel: init') found"
                         )
                     self.env = self._create_env(self.dir_abspath)
-                    with context_chdir(self.dir_abspath):
+                    with context_chdir(self.dir_abspath), context_template_dir(self.dir_abspath):
                         exec(child_text, self.env)
 
                     if "sheet" not in self.env:
@@ -114,7 +218,7 @@ class SvgTemplate:
             for child in filter_text_elts(list(elt)):
                 child_text = get_text_of(child)
                 if child_text.startswith("# pysvglabel: row"):
-                    self.row_contents.append(child_text)
+                    self.row_codes.append(compile(child_text, f"<{self.file_abspath} row block>", "exec"))
                     elt.remove(child)  # remove the code block from the template
 
         visit(newroot, replace_row)
@@ -123,7 +227,7 @@ class SvgTemplate:
             for child in filter_text_elts(list(elt)):
                 child_text = get_text_of(child)
                 if child_text.startswith("# pysvglabel: end"):
-                    self.end_contents.append(child_text)
+                    self.end_codes.append(compile(child_text, f"<{self.file_abspath} end block>", "exec"))
                     elt.remove(child)  # remove the code block from the template
 
         visit(newroot, replace_end)
@@ -131,6 +235,8 @@ class SvgTemplate:
         # split the combined SVG into a skeleton and template elements
         self.skeleton, template = self.split_skeleton_template(newroot)
         self.template = SvgTemplateInstance(template, self.dir_abspath)
+        # label positions are the same on every page, so are computed once here
+        self.slot_transforms = self.sheet.slot_transforms(self.template.size, self._viewbox_scale())
 
     def split_skeleton_template(self, root: ET.Element) -> Tuple[ET.Element, ET.Element]:
         """Given a root SVG element, returns a tuple of (skeleton, template) elements.
@@ -191,75 +297,156 @@ class SvgTemplate:
 
         return top
 
-    def apply_instance(self, row: Dict[str, str], table: List[Dict[str, str]], row_num: int) -> ET.Element:
+    def apply_instance(
+        self, row: Dict[str, str], table: List[Dict[str, str]], row_num: int, share_static: bool = False
+    ) -> ET.Element:
         """Creates a copy of this template, with substitutions for the given row data.
-        The env dict is shallow-copied, so variable changes aren't reflected in other rows,
-        but mutation effects will be visible."""
-        instance_env = copy(self.env)
-        value_variables = {key: value for key, value in row.items() if key.isidentifier()}  # discard non-identifiers
-        instance_env.update(value_variables)
+        Row variables are defined in a layer over the env dict (see _layer_env), so variable changes aren't reflected
+        in other rows, but mutation effects (including of init block variables by init block functions) will be.
+        If share_static is set, static subtrees (which don't depend on row data) are shared with the template and
+        other labels instead of copied, which is faster, but the label must then not be modified in place
+        (flatten_transforms and compact leave their input unchanged)."""
+        instance_env = self._layer_env(
+            self.env, {column: row[column] for column in identifier_columns(tuple(row))}  # discard non-identifiers
+        )
         instance_env.update({"row": row, "table": table, "row_num": row_num})
-        with context_chdir(self.dir_abspath):
-            for row_code in self.row_contents:
+        profiler = current_profiler()
+        start = time.perf_counter() if profiler is not None else 0.0
+        with context_template_dir(self.dir_abspath):
+            for row_code in self.row_codes:
                 exec(row_code, instance_env)
+        if profiler is not None:
+            profiler.record("template.row_block", time.perf_counter() - start)
 
         instance_svg = self.template.apply_instance(instance_env)
         new_group = ET.Element(f"{SVG_NAMESPACE}g")
         for child in instance_svg:
             new_group.append(child)
 
+        if not share_static:
+            new_group = deepcopy(new_group)
         return new_group
 
-    def apply_page(self, table: List[Dict[str, str]]) -> ET.Element:
-        """Given a table containing at most one page's worth of entries, creates a page of labels.
-        If there are less entries than a full page, returns a partial page."""
-        new_root = ET.Element(f"{SVG_NAMESPACE}g")
-
-        margin_x, margin_y = self.sheet.get_margins(self.template.size)
-        viewbox_scale_x, viewbox_scale_y = self._viewbox_scale()
-        pos_x = 0
-        pos_y = 0
-        for row_num, row in enumerate(table):
-            if row_num >= self.sheet.labels_per_sheet():
-                raise BadTemplateException(f"table contains more entries than {self.sheet.labels_per_sheet()} per page")
-
-            if not self.sheet.flip_x:
-                offset_x = margin_x + (self.template.size[0] + self.sheet.space[0]) * pos_x
-            else:
-                offset_x = margin_x + (self.template.size[0] + self.sheet.space[0]) * (self.sheet.count[0] - 1 - pos_x)
-            offset_y = margin_y + (self.template.size[1] + self.sheet.space[1]) * pos_y
-
-            instance = self.apply_instance(row, table, row_num)
-            assert "transform" not in instance.attrib
-            instance.attrib["transform"] = (
-                f"translate({offset_x.to_px() * viewbox_scale_x}, {offset_y.to_px() * viewbox_scale_y})"
+    def _iter_instances(
+        self, table: List[Dict[str, str]], workers: Optional[int], share_static: bool
+    ) -> Iterator[ET.Element]:
+        """Lazily creates label instances (as in apply_instance) for each row in the table, in table order."""
+        if workers is None or workers <= 1:
+            for row_num, row in enumerate(table):
+                yield self.apply_instance(row, table, row_num, share_static)
+        else:
+            # each row runs in a copy of the calling context, so context variables (eg, SharedDefs) are visible
+            contexts = [copy_context() for _ in table]
+            from concurrent.futures import ThreadPoolExecutor  # only imported if needed, for faster startup
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                yield from executor.map(
+                    lambda context, row, row_num: context.run(self.apply_instance, row, table, row_num, share_static),
+                    contexts,
+                    table,
+                    range(len(table)),
+                )
+
+    def render_rows(
+        self, table: List[Dict[str, str]], workers: Optional[int] = None, share_static: bool = False
+    ) -> List[ET.Element]:
+        """Creates label instances (as in apply_instance, including share_static) for each row in the table,
+        returned in table order.
+        If workers is greater than one, rows are rendered concurrently on a pool of that many threads,
+        in which case row blocks may run concurrently and in any order."""
+        return list(self._iter_instances(table, workers, share_static))
+
+    def iter_labels(
+        self,
+        table: List[Dict[str, str]],
+        workers: Optional[int] = None,
+        start_slot: int = 0,
+        share_static: bool = False,
+    ) -> Iterator[ET.Element]:
+        """Given a table containing at most one page's worth of entries, lazily yields the labels of the page
+        positioned on the sheet, each as soon as it is rendered. See apply_page."""
+        if not 0 <= start_slot < self.sheet.labels_per_sheet():
+            raise ValueError(f"start_slot must be in [0, {self.sheet.labels_per_sheet()}), got {start_slot}")
+        if len(table) > self.sheet.labels_per_sheet() - start_slot:
+            raise BadTemplateException(
+                f"table contains more entries than {self.sheet.labels_per_sheet() - start_slot} free slots per page"
             )
 
-            new_root.append(instance)
-
-            if self.sheet.vertical:
-                pos_y += 1
-                if pos_y >= self.sheet.count[1]:
-                    pos_y = 0
-                    pos_x += 1
-            else:
-                pos_x += 1
-                if pos_x >= self.sheet.count[0]:
-                    pos_x = 0
-                    pos_y += 1
-
+        for slot, instance in enumerate(self._iter_instances(table, workers, share_static), start_slot):
+            assert "transform" not in instance.attrib
+            instance.attrib["transform"] = self.slot_transforms[slot]
+            yield instance
+
+    def apply_page(
+        self,
+        table: List[Dict[str, str]],
+        workers: Optional[int] = None,
+        start_slot: int = 0,
+        share_static: bool = False,
+    ) -> ET.Element:
+        """Given a table containing at most one page's worth of entries, creates a page of labels.
+        If there are less entries than a full page, returns a partial page.
+        The table is available to template code as table, with row_num being the index of the current row in it.
+        If workers is greater than one, labels are rendered on a thread pool, see render_rows.
+        Labels are placed starting from start_slot (in fill order, see LabelSheet.slot_positions),
+        for example to continue on a partially used sheet.
+        Labels are independent copies, unless share_static is set, see apply_instance."""
+        new_root = ET.Element(f"{SVG_NAMESPACE}g")
+        new_root.extend(
+            list(self.iter_labels(table, workers, start_slot, share_static))
+        )  # extend masks exceptions from generators
         return new_root
 
+    def iter_page_tables(self, rows: Iterable[Dict[str, str]], start_slot: int = 0) -> Iterator[List[Dict[str, str]]]:
+        """Lazily chunks rows into page-sized tables, pulling only one page's worth of rows at a time.
+        The first page only holds the labels from start_slot onwards."""
+        rows_iter = iter(rows)
+        page_size = self.sheet.labels_per_sheet() - start_slot
+        while True:
+            page_table = list(islice(rows_iter, page_size))
+            if not page_table:
+                return
+            yield page_table
+            page_size = self.sheet.labels_per_sheet()
+
+    def iter_pages(
+        self,
+        rows: Iterable[Dict[str, str]],
+        workers: Optional[int] = None,
+        start_slot: int = 0,
+        share_static: bool = False,
+    ) -> Iterator[ET.Element]:
+        """Generator that lazily consumes rows and yields finished sheets (as from create_sheet), one per page,
+        so arbitrarily large inputs (eg, a csv.DictReader) can be rendered with bounded memory.
+
+        As with apply_page, the table seen by template code (the table variable) is the current page's rows,
+        and row_num is the index within that page: only one page of rows is held in memory at a time.
+        The first page is filled from start_slot, and static subtrees are shared if share_static is set,
+        as in apply_page."""
+        for page_table in self.iter_page_tables(rows, start_slot):
+            sheet = self.create_sheet()
+            sheet.append(self.apply_page(page_table, workers, start_slot, share_static))
+            yield sheet
+            start_slot = 0
+
     def run_end(self) -> None:
         """Call this to run the end block of the template."""
-        end_env = copy(self.env)
-        with context_chdir(self.dir_abspath):
-            for end_code in self.end_contents:
+        end_env = self._layer_env(self.env, {})
+        with context_chdir(self.dir_abspath), context_template_dir(self.dir_abspath):
+            for end_code in self.end_codes:
                 exec(end_code, end_env)
 
 
 class SvgTemplateInstance:
-    """Class that defines a SVG template only, excluding top-level data like init block."""
+    """Class that defines a SVG template only, excluding top-level data like init block.
+
+    Template text (as f-strings) and 🐍 expressions are compiled once on construction and bound to their
+    template nodes, so applying an instance only runs precompiled code.
+
+    The template is also partitioned into static and dynamic subtrees on construction.
+    Dynamic subtrees (🐍 groups, text with substitutions, and their ancestors) are copied per instance,
+    while static subtrees are shared between instances, so instances must not be mutated in place
+    (SvgTemplate copies them for its callers, unless requested otherwise)."""
 
     def __init__(self, template: ET.Element, dir_abspath: str):
         from ..labelfrontend.units import LengthDimension
@@ -275,55 +462,193 @@ class SvgTemplateInstance:
         self.dir_abspath = dir_abspath
         self.template = template
 
+        # compiled code bound to template nodes, as (source, code) so modified nodes can be detected
+        self._text_codes: Dict[ET.Element, Tuple[str, CodeType]] = {}  # for elt.text
+        self._tail_codes: Dict[ET.Element, Tuple[str, CodeType]] = {}  # for elt.tail
+        # for all non-static template groups, optional (🐍 textbox, source, code)
+        self._command_codes: Dict[ET.Element, Optional[Tuple[ET.Element, str, CodeType]]] = {}
+
+        self._deep: Set[ET.Element] = set()  # subtrees deep-copied per instance
+        self._dynamic: Set[ET.Element] = set()  # shallow-copied per instance, as ancestors of deep subtrees
+        self._static: Set[ET.Element] = set()  # roots of shared subtrees, which are children of dynamic elements
+        for child in self.template:
+            if self._compile_group(child, False):
+                self._dynamic.add(child)
+        for elt in [self.template] + list(self._dynamic):
+            self._static.update(child for child in elt if child not in self._deep and child not in self._dynamic)
+
+    def _compile_text(self, elt: ET.Element) -> bool:
+        """Compiles the text contents of a text element, mirroring process_text in apply_instance.
+        Returns whether any text has substitutions."""
+        has_substitution = False
+        for child in filter_text_inner_elts(list(elt)):
+            has_substitution = self._compile_text(child) or has_substitution
+        try:
+            if elt.text:
+                self._text_codes[elt] = (elt.text, compile_fstring(elt.text))
+                has_substitution = has_substitution or not is_constant_fstring(elt.text)
+            for child in elt:
+                if child.tail:
+                    self._tail_codes[child] = (child.tail, compile_fstring(child.tail))
+                    has_substitution = has_substitution or not is_constant_fstring(child.tail)
+        except SyntaxError as e:
+            raise BadTemplateException(f"invalid template text {get_text_of(elt)!r}: {e}") from e
+        return has_substitution
+
+    def _fold_text(self, elt: ET.Element) -> None:
+        """Evaluates constant text of a text element in place (eg, resolving escapes), removing its compiled code,
+        so it can be shared between instances."""
+        for child in filter_text_inner_elts(list(elt)):
+            self._fold_text(child)
+        if elt in self._text_codes:
+            elt.text = cast(str, eval(self._text_codes.pop(elt)[1], {}))
+        for child in elt:
+            if child in self._tail_codes:
+                child.tail = cast(str, eval(self._tail_codes.pop(child)[1], {}))
+
+    @staticmethod
+    def _compile_command(elt: ET.Element) -> Optional[Tuple[ET.Element, str, CodeType]]:
+        """Returns the compiled 🐍 command of a group, as (🐍 textbox, source, code), or None if there is none."""
+        text_child_elts = filter_text_elts(list(elt))
+        command_child_elts = [
+            text_child_elt for text_child_elt in text_child_elts if get_text_of(text_child_elt).startswith("🐍")
+        ]
+        if len(command_child_elts) == 1:
+            command_elt = command_child_elts[0]
+            code = get_text_of(command_elt).strip("🐍")
+            try:
+                return command_elt, code, compile_command(code)
+            except SyntaxError as e:
+                raise BadTemplateException(f"invalid 🐍 expression {code!r}: {e}") from e
+        elif len(command_child_elts) > 1:
+            raise BadTemplateException("cannot have multiple 🐍 textboxes in the same group")
+        return None
+
+    def _compile_group(self, elt: ET.Element, in_command: bool) -> bool:
+        """Compiles the 🐍 command and text of a group and its subgroups, mirroring apply_template in apply_instance.
+        in_command indicates this is within a 🐍 group, which is copied as a whole.
+        Returns whether the group is dynamic (needs to be copied per instance)."""
+        command = self._compile_command(elt)
+        self._command_codes[elt] = command
+        if command is not None and not in_command:
+            self._deep.add(elt)
+        in_command = in_command or command is not None
+
+        dynamic = command is not None
+        for child in filter_text_elts(list(elt)):
+            if command is not None and child is command[0]:
+                continue
+            if self._compile_text(child):
+                if not in_command:
+                    self._deep.add(child)
+                dynamic = True
+            elif not in_command:  # text within 🐍 groups is copied, so must keep its source for evaluation
+                self._fold_text(child)
+
+        for child in elt.findall("svg:g", NAMESPACES):
+            if self._compile_group(child, in_command) and not in_command:
+                self._dynamic.add(child)
+                dynamic = True
+
+        if not dynamic and not in_command:  # static groups are never visited, groups in 🐍 groups are copied
+            del self._command_codes[elt]
+        return dynamic
+
+    def _instantiate(self, elt: ET.Element, memo: Dict[int, Any]) -> ET.Element:
+        """Returns a per-instance copy of a template element, copying dynamic elements and sharing static ones.
+        Copies are recorded in memo, as with deepcopy."""
+        if elt in self._deep:
+            return deepcopy(elt, memo)
+        elif elt not in self._dynamic and elt is not self.template:
+            return elt
+        new_elt = elt.makeelement(elt.tag, elt.attrib)
+        new_elt.text = elt.text
+        new_elt.tail = elt.tail
+        memo[id(elt)] = new_elt
+        new_elt.extend([self._instantiate(child, memo) for child in elt])
+        return new_elt
+
+    @staticmethod
+    def _bind(
+        codes: Dict[ET.Element, Tuple[str, CodeType]], memo: Dict[int, Any]
+    ) -> Dict[ET.Element, Tuple[str, CodeType]]:
+        """Re-keys compiled code from template nodes to their copies, given the copy memo."""
+        return {memo[id(elt)]: source_code for elt, source_code in codes.items()}
+
     def apply_instance(self, env: Dict[str, Any]) -> ET.Element:
         """Creates a copy of this template, with specified environment containing global / local variables.
-        The root element is preserved."""
-        new_root = deepcopy(self.template)
+        The root element is preserved. Static subtrees are shared with the template and other instances."""
+        profiler = current_profiler()
+        start = time.perf_counter() if profiler is not None else 0.0
+        memo: Dict[int, Any] = {}
+        new_root = self._instantiate(self.template, memo)
+        text_codes = self._bind(self._text_codes, memo)
+        tail_codes = self._bind(self._tail_codes, memo)
+        command_codes = {
+            memo[id(elt)]: (memo[id(command[0])], command[1], command[2]) if command is not None else None
+            for elt, command in self._command_codes.items()
+        }
+        if profiler is not None:
+            profiler.record("instance.copy", time.perf_counter() - start)
+
+        def eval_text(text: str, source_code: Optional[Tuple[str, CodeType]]) -> str:
+            if source_code is not None and source_code[0] == text:
+                return cast(str, eval(source_code[1], env))
+            else:  # node created or modified by a GroupReplacer, compile on demand
+                return cast(str, eval(compile_fstring(text), env))
 
         def process_text(elt: ET.Element) -> None:
             for child in filter_text_inner_elts(list(elt)):
                 process_text(child)
-            with context_chdir(self.dir_abspath):
-                if elt.text:
-                    elt.text = eval(
-                        f'f"""{elt.text}"""', env
-                    )  # TODO proper escaping, though """ in a label is unlikely
-                for child in elt:
-                    if child.tail:
-                        child.tail = eval(f'f"""{child.tail}"""', env)  # TODO proper escaping
+            if elt.text:
+                elt.text = eval_text(elt.text, text_codes.get(elt))
+            for child in elt:
+                if child.tail:
+                    child.tail = eval_text(child.tail, tail_codes.get(child))
 
         def apply_template(elt: ET.Element) -> None:
             from .GroupReplacer import GroupReplacer
 
-            text_child_elts = filter_text_elts(list(elt))
-            command_child_elts = [
-                text_child_elt for text_child_elt in text_child_elts if get_text_of(text_child_elt).startswith("🐍")
-            ]
-            if len(command_child_elts) == 1:
-                command_elt = command_child_elts[0]
-                code = get_text_of(command_elt).strip("🐍")
-                with context_chdir(self.dir_abspath):
-                    obj = eval(code, env)
+            if elt in command_codes:
+                command = command_codes[elt]
+            else:  # group created by a GroupReplacer, compile on demand
+                command = self._compile_command(elt)
+            if command is not None:
+                command_elt, code, compiled = command
+                obj = eval(compiled, env)
                 if not isinstance(obj, GroupReplacer):
                     raise BadTemplateException(
                         f"🐍 textbox expected result of type GroupReplacer, got {type(obj)}, in {code}"
                     )
 
                 elt.remove(command_elt)
+                start = time.perf_counter() if profiler is not None else 0.0
                 new_elts = obj.process_group(list(elt))
+                if profiler is not None:
+                    profiler.record(f"group_replacer.{obj.__class__.__name__}", time.perf_counter() - start)
                 for child in list(elt):  # elt.clear also deletes attribs
                     elt.remove(child)
                 elt.extend(new_elts)
-            elif len(command_child_elts) > 1:
-                raise BadTemplateException("cannot have multiple 🐍 textboxes in the same group")
 
             text_child_elts = filter_text_elts(
                 list(elt)
             )  # make sure to process text on the output of command blocks too
+            start = time.perf_counter() if profiler is not None else 0.0
             for child in text_child_elts:
-                process_text(child)
-
-        for child in new_root:
-            visit(child, apply_template)
+                if child not in self._static:
+                    process_text(child)
+            if profiler is not None:
+                profiler.record("instance.eval_text", time.perf_counter() - start)
+
+        def visit_dynamic(elt: ET.Element) -> None:
+            if elt in self._static:  # shared with the template, nothing to evaluate
+                return
+            apply_template(elt)
+            for child in elt.findall("svg:g", NAMESPACES):
+                visit_dynamic(child)
+
+        with context_template_dir(self.dir_abspath):
+            for child in new_root:
+                visit_dynamic(child)
 
         return new_root
@@ -1,6 +1,52 @@
 # Core classes, not intended to be user-facing
-from .SvgTemplate import SvgTemplate, SvgTemplateInstance, filter_text_elts, filter_text_inner_elts
-from .InkscapeSubprocess import InkscapeSubprocess
+# Exports are imported on first use (see lazy_exports), so importing one module doesn't import all of labelcore
+from typing import TYPE_CHECKING
 
-from .common import SVG_NAMESPACE, INKSCAPE_NAMESPACE, SODIPODI_NAMESPACE, NAMESPACES, BadTemplateException
-from .GroupReplacer import GroupReplacer, RectGroupReplacer
+from .lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .SvgTemplate import SvgTemplate, SvgTemplateInstance, filter_text_elts, filter_text_inner_elts, resolve_path
+    from .InkscapeSubprocess import InkscapeSubprocess
+    from .InkscapePool import InkscapePool, InkscapeError
+    from .ConversionCache import ConversionCache
+    from .Manifest import Manifest
+    from .SvgStreamWriter import SvgStreamWriter, document_prefixes, serialize_fragment
+    from .SvgCache import SvgCache, svg_cache
+    from .SharedDefs import SharedDefs, context_shared_defs
+    from .optimize import flatten_transforms, compact
+    from .Profiler import Profiler, context_profiler, profile_phase
+
+    from .common import SVG_NAMESPACE, INKSCAPE_NAMESPACE, SODIPODI_NAMESPACE, NAMESPACES, BadTemplateException
+    from .common import register_namespaces
+    from .GroupReplacer import GroupReplacer, RectGroupReplacer
+
+lazy_exports(
+    __name__,
+    {
+        "SvgTemplate": [
+            "SvgTemplate",
+            "SvgTemplateInstance",
+            "filter_text_elts",
+            "filter_text_inner_elts",
+            "resolve_path",
+        ],
+        "InkscapeSubprocess": ["InkscapeSubprocess"],
+        "InkscapePool": ["InkscapePool", "InkscapeError"],
+        "ConversionCache": ["ConversionCache"],
+        "Manifest": ["Manifest"],
+        "SvgStreamWriter": ["SvgStreamWriter", "document_prefixes", "serialize_fragment"],
+        "SvgCache": ["SvgCache", "svg_cache"],
+        "SharedDefs": ["SharedDefs", "context_shared_defs"],
+        "optimize": ["flatten_transforms", "compact"],
+        "Profiler": ["Profiler", "context_profiler", "profile_phase"],
+        "common": [
+            "SVG_NAMESPACE",
+            "INKSCAPE_NAMESPACE",
+            "SODIPODI_NAMESPACE",
+            "NAMESPACES",
+            "BadTemplateException",
+            "register_namespaces",
+        ],
+        "GroupReplacer": ["GroupReplacer", "RectGroupReplacer"],
+    },
+)
@@ -1,3 +1,6 @@
+import xml.etree.ElementTree as ET
+
+
 class BadTemplateException(Exception):
     """Base class for all template errors."""
 
@@ -7,6 +10,7 @@ class BadTemplateException(Exception):
 SVG_NAMESPACE = "{http://www.w3.org/2000/svg}"
 SODIPODI_NAMESPACE = "{http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd}"
 INKSCAPE_NAMESPACE = "{http://www.inkscape.org/namespaces/inkscape}"
+XLINK_NAMESPACE = "{http://www.w3.org/1999/xlink}"
 NAMESPACES = {
     "svg": "http://www.w3.org/2000/svg",
     "inkscape": "http://www.w3.org/2000/svg",
@@ -27,3 +31,18 @@ SVG_GRAPHICS_TAGS = [
     f"{SVG_NAMESPACE}use",
     f"{SVG_NAMESPACE}g",
 ]
+
+# prefixes for serialization, with SVG as the default namespace, see register_namespaces
+SERIALIZATION_PREFIXES = {
+    "": SVG_NAMESPACE[1:-1],
+    "inkscape": INKSCAPE_NAMESPACE[1:-1],
+    "sodipodi": SODIPODI_NAMESPACE[1:-1],
+    "xlink": XLINK_NAMESPACE[1:-1],
+}
+
+
+def register_namespaces() -> None:
+    """Registers SERIALIZATION_PREFIXES with ElementTree, so serialized SVG uses a default namespace and the usual
+    prefixes (instead of ns0:svg and so on). This applies to all later serialization in the process."""
+    for prefix, uri in SERIALIZATION_PREFIXES.items():
+        ET.register_namespace(prefix, uri)
@@ -0,0 +1,37 @@
+import importlib
+import sys
+from types import ModuleType
+from typing import Any, Dict, List
+
+
+class _LazyPackage(ModuleType):
+    """Package module whose exports are imported from their submodules on first access.
+    Exports take precedence over same-named submodules (eg, the SvgTemplate class over the SvgTemplate module, which
+    the import system would otherwise set on the package when imported), as with eager imports in the package."""
+
+    _lazy_exports: Dict[str, str]  # export name -> submodule
+
+    def __getattr__(self, name: str) -> Any:
+        submodule = self._lazy_exports.get(name)
+        if submodule is None:
+            raise AttributeError(f"module {self.__name__!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(f"{self.__name__}.{submodule}"), name)
+        super().__setattr__(name, value)  # cached, so later accesses are regular attribute lookups
+        return value
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if isinstance(value, ModuleType) and name in self._lazy_exports:
+            return
+        super().__setattr__(name, value)
+
+    def __dir__(self) -> List[str]:
+        return sorted(set(super().__dir__()) | set(self._lazy_exports))
+
+
+def lazy_exports(package_name: str, exports: Dict[str, List[str]]) -> None:
+    """Makes a package's exports, by submodule, imported on first access instead of when the package is imported.
+    Call this from the package __init__, with the same exports imported under TYPE_CHECKING for type checkers.
+    Star imports of the package (using its __all__) still import every export."""
+    package = sys.modules[package_name]
+    package.__dict__["_lazy_exports"] = {name: submodule for submodule, names in exports.items() for name in names}
+    package.__class__ = _LazyPackage
@@ -0,0 +1,294 @@
+import re
+import xml.etree.ElementTree as ET
+from typing import AbstractSet, Iterable, List, Optional, Set, Tuple
+
+from .common import SVG_NAMESPACE, INKSCAPE_NAMESPACE, SODIPODI_NAMESPACE
+
+# 2D affine transform as (a, b, c, d, e, f), as in the SVG matrix(a, b, c, d, e, f) transform
+Matrix = Tuple[float, float, float, float, float, float]
+
+_IDENTITY: Matrix = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+_TRANSFORM_RE = re.compile(r"\s*([a-zA-Z]+)\s*\(([^)]*)\)\s*,?")
+_REFERENCE_RE = re.compile(r"#([A-Za-z_][\w.:-]*)")  # as in href="#id", url(#id), and #id CSS selectors
+_NUMBER_RE = re.compile(r"([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)")
+
+# containers whose children may be restructured, which excludes eg switch where the position of children matters
+_CONTAINER_TAGS = {f"{SVG_NAMESPACE}{tag}" for tag in ["svg", "g", "a", "defs", "symbol"]}
+# elements that can take a transform pushed down from a parent group, which excludes nested svg elements
+# (that can't have a transform in SVG 1.1)
+_TRANSFORMABLE_TAGS = {
+    f"{SVG_NAMESPACE}{tag}"
+    for tag in ["g", "path", "rect", "circle", "ellipse", "line", "polyline", "polygon", "text", "image", "use"]
+}
+
+
+def _multiply(m1: Matrix, m2: Matrix) -> Matrix:
+    """Returns the transform applying m2 and then m1, as in the transform list "m1 m2"."""
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (
+        a1 * a2 + c1 * b2,
+        b1 * a2 + d1 * b2,
+        a1 * c2 + c1 * d2,
+        b1 * c2 + d1 * d2,
+        a1 * e2 + c1 * f2 + e1,
+        b1 * e2 + d1 * f2 + f1,
+    )
+
+
+def parse_transform(transform: str) -> Optional[Matrix]:
+    """Parses a transform attribute of translate, scale, and matrix transforms into a single matrix,
+    or returns None if it contains other transforms (like rotate) or non-numeric arguments (like units)."""
+    matrix = _IDENTITY
+    pos = 0
+    while pos < len(transform):
+        match = _TRANSFORM_RE.match(transform, pos)
+        if match is None:
+            if transform[pos:].strip():
+                return None
+            break
+        pos = match.end()
+        try:
+            args = [float(arg) for arg in match.group(2).replace(",", " ").split()]
+        except ValueError:
+            return None
+        name = match.group(1)
+        if name == "translate" and len(args) in (1, 2):
+            matrix = _multiply(matrix, (1.0, 0.0, 0.0, 1.0, args[0], args[1] if len(args) == 2 else 0.0))
+        elif name == "scale" and len(args) in (1, 2):
+            matrix = _multiply(matrix, (args[0], 0.0, 0.0, args[-1], 0.0, 0.0))
+        elif name == "matrix" and len(args) == 6:
+            matrix = _multiply(matrix, (args[0], args[1], args[2], args[3], args[4], args[5]))
+        else:
+            return None
+    return matrix
+
+
+def format_transform(matrix: Matrix) -> str:
+    """Returns the shortest of a translate, scale, or matrix transform attribute for a matrix."""
+    a, b, c, d, e, f = matrix
+    if (a, b, c, d) == (1.0, 0.0, 0.0, 1.0):
+        return f"translate({e}, {f})"
+    elif b == 0.0 and c == 0.0 and e == 0.0 and f == 0.0:
+        return f"scale({a}, {d})"
+    else:
+        return f"matrix({a}, {b}, {c}, {d}, {e}, {f})"
+
+
+def _combine_transforms(outer: str, inner: str) -> str:
+    """Returns a transform attribute equivalent to applying inner and then outer, folded into a single transform
+    where possible, otherwise as a transform list."""
+    outer_matrix = parse_transform(outer)
+    inner_matrix = parse_transform(inner)
+    if outer_matrix is None or inner_matrix is None:
+        return f"{outer} {inner}"
+    return format_transform(_multiply(outer_matrix, inner_matrix))
+
+
+def _is_blank(text: Optional[str]) -> bool:
+    return text is None or not text.strip()
+
+
+def referenced_ids(elt: ET.Element) -> Set[str]:
+    """Returns the ids that may be referenced from elt or its descendants (by href, url(), or in a stylesheet).
+    This is conservative, and may include ids that aren't actually referenced."""
+    ids: Set[str] = set()
+    for descendant in elt.iter():
+        for value in descendant.attrib.values():
+            ids.update(_REFERENCE_RE.findall(value))
+        if descendant.text:
+            ids.update(_REFERENCE_RE.findall(descendant.text))
+    return ids
+
+
+def _is_removable(elt: ET.Element, keep_ids: AbstractSet[str]) -> bool:
+    """Returns whether elt is a group that only has a transform and attributes that don't affect rendering,
+    so it can be removed or its transform moved to its contents."""
+    if elt.tag != f"{SVG_NAMESPACE}g" or not _is_blank(elt.text):
+        return False
+    for key in elt.attrib.keys():
+        if key == "transform" or key.startswith(INKSCAPE_NAMESPACE) or key.startswith(SODIPODI_NAMESPACE):
+            continue  # editor metadata (like layer names) doesn't affect rendering
+        if key == "id" and elt.attrib["id"] not in keep_ids:
+            continue
+        return False
+    return True
+
+
+def _copy_element(elt: ET.Element, children: List[ET.Element]) -> ET.Element:
+    """Returns a shallow copy of elt with different children, leaving elt (which may be shared) unchanged."""
+    new_elt = elt.makeelement(elt.tag, dict(elt.attrib))
+    new_elt.text = elt.text
+    new_elt.tail = elt.tail
+    new_elt.extend(children)
+    return new_elt
+
+
+def _flatten_child(elt: ET.Element, keep_ids: AbstractSet[str]) -> List[ET.Element]:
+    """Returns the elements replacing elt in its parent container, which may be elt itself if unchanged."""
+    if elt.tag not in _CONTAINER_TAGS:
+        return [elt]
+
+    children = list(elt)
+    new_children = [new_child for child in children for new_child in _flatten_child(child, keep_ids)]
+    if len(new_children) != len(children) or any(new is not old for new, old in zip(new_children, children)):
+        elt = _copy_element(elt, new_children)
+
+    if not _is_removable(elt, keep_ids):
+        return [elt]
+    if not new_children:  # empty groups render nothing
+        return []
+    if "transform" not in elt.attrib:  # groups that do nothing can be replaced by their contents
+        return new_children
+    child = new_children[0]
+    # push the transform down, unless the child is referenced elsewhere where it would gain the transform
+    if len(new_children) == 1 and child.tag in _TRANSFORMABLE_TAGS and child.attrib.get("id") not in keep_ids:
+        new_child = _copy_element(child, list(child))
+        if "transform" in child.attrib:
+            new_child.attrib["transform"] = _combine_transforms(elt.attrib["transform"], child.attrib["transform"])
+        else:
+            new_child.attrib["transform"] = elt.attrib["transform"]
+        return [new_child]
+    return [elt]
+
+
+def flatten_transforms(elt: ET.Element, keep_ids: Iterable[str] = ()) -> ET.Element:
+    """Returns elt with reduced group nesting, by folding chains of group transforms into the single element they
+    contain (combining translate, scale, and matrix transforms into one), replacing groups without a transform
+    by their contents, and removing empty groups.
+    Groups with attributes that affect rendering (like style or clip-path) are kept, as are groups with ids
+    referenced within elt or listed in keep_ids (eg, referenced_ids of the rest of the document).
+    Transforms are not pushed onto nested svg elements, so the result renders the same.
+
+    elt itself is kept (though it may be copied), and is not modified: any changed elements are copies,
+    so this is safe to use on trees that share subtrees (like labels with static content)."""
+    all_keep_ids = referenced_ids(elt).union(keep_ids)
+    children = list(elt)
+    new_children = [new_child for child in children for new_child in _flatten_child(child, all_keep_ids)]
+    if len(new_children) == len(children) and all(new is old for new, old in zip(new_children, children)):
+        return elt
+    return _copy_element(elt, new_children)
+
+
+# attributes that are coordinates or lengths, which compact rounds
+_COORDINATE_ATTRIBS = {
+    "x",
+    "y",
+    "dx",
+    "dy",
+    "width",
+    "height",
+    "cx",
+    "cy",
+    "r",
+    "rx",
+    "ry",
+    "x1",
+    "y1",
+    "x2",
+    "y2",
+    "d",
+    "points",
+    "viewBox",
+    "stroke-width",
+}
+_SIGNIFICANT_DIGITS = 6  # for scale factors, where rounding error is relative
+# editor attributes that do affect rendering, by Inkscape (like line breaks in text)
+_KEEP_EDITOR_ATTRIBS = {f"{SODIPODI_NAMESPACE}role"}
+
+
+def _format_number(value: float, precision: int) -> str:
+    text = f"{value:.{precision}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    if text == "-0":
+        text = "0"
+    return text
+
+
+def _round_numbers(value: str, precision: int, significant: List[int] = []) -> str:
+    """Rounds the numbers in an attribute value to precision decimal places, keeping their separators,
+    except the numbers at indices in significant, which are rounded to significant digits instead."""
+    parts = _NUMBER_RE.split(value)  # alternating separators and numbers
+    for i in range(1, len(parts), 2):
+        if "." not in parts[i] and "e" not in parts[i].lower():  # integers are left as-is
+            continue
+        if i // 2 in significant:
+            parts[i] = f"{float(parts[i]):.{_SIGNIFICANT_DIGITS}g}"
+        else:
+            parts[i] = _format_number(float(parts[i]), precision)
+        if not parts[i - 1] and i >= 2 and not parts[i].startswith(("-", "+")):
+            parts[i - 1] = " "  # keep adjacent numbers (as in paths, like 1.5.5) separate
+    return "".join(parts)
+
+
+def _round_transform(transform: str, precision: int) -> str:
+    """Rounds the translations of a transform attribute to precision decimal places, and other factors
+    (like scales) to significant digits."""
+    parts = []
+    for match in _TRANSFORM_RE.finditer(transform):
+        name, args = match.group(1), match.group(2)
+        if name == "translate":
+            significant: List[int] = []
+        elif name == "matrix":
+            significant = [0, 1, 2, 3]
+        elif name == "rotate":
+            significant = []  # angle in degrees and center point
+        else:  # scale, skew
+            significant = [0, 1]
+        parts.append(f"{name}({_round_numbers(args, precision, significant)})")
+    return " ".join(parts)
+
+
+def _is_editor_tag(tag: str) -> bool:
+    return tag.startswith(INKSCAPE_NAMESPACE) or tag.startswith(SODIPODI_NAMESPACE) or tag == f"{SVG_NAMESPACE}metadata"
+
+
+def _compact(elt: ET.Element, precision: int, keep_namedview: bool) -> Optional[ET.Element]:
+    """Returns the compacted elt, which may be elt itself if unchanged, or None if it is removed.
+    keep_namedview applies to direct children only, since nested svg elements may also have a namedview."""
+    if not isinstance(elt.tag, str):  # comments and processing instructions
+        return elt
+    if _is_editor_tag(elt.tag):
+        return None
+
+    attrib = {}
+    for key, value in elt.attrib.items():
+        if _is_editor_tag(key) and key not in _KEEP_EDITOR_ATTRIBS:
+            continue
+        if key == "transform":
+            value = _round_transform(value, precision)
+        elif key in _COORDINATE_ATTRIBS:
+            value = _round_numbers(value, precision)
+        attrib[key] = value
+
+    children = list(elt)
+    compacted_children = [
+        child if keep_namedview and child.tag == f"{SODIPODI_NAMESPACE}namedview" else _compact(child, precision, False)
+        for child in children
+    ]
+    new_children = [new_child for new_child in compacted_children if new_child is not None]
+    if (
+        attrib == elt.attrib
+        and len(new_children) == len(children)
+        and all(new is old for new, old in zip(new_children, children))
+    ):
+        return elt
+    new_elt = _copy_element(elt, new_children)
+    new_elt.attrib.clear()
+    new_elt.attrib.update(attrib)
+    return new_elt
+
+
+def compact(elt: ET.Element, precision: int = 3, keep_namedview: bool = False) -> ET.Element:
+    """Returns elt with smaller serialized output, by rounding coordinates to precision decimal places (in the user
+    units of each element; scale factors keep significant digits instead), and removing editor data that doesn't
+    affect rendering: Inkscape and sodipodi elements and attributes (except sodipodi:role, which affects text
+    layout in Inkscape), and metadata.
+    The sodipodi:namedview of elt can be kept with keep_namedview, as needed for Inkscape multipage documents.
+    Use with register_namespaces, so serialized output also uses short namespace prefixes.
+
+    As with flatten_transforms, elt is not modified and changed elements are copies."""
+    compacted = _compact(elt, precision, keep_namedview)
+    assert compacted is not None, "can't compact an editor-only element"
+    return compacted
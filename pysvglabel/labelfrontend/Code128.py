@@ -1,4 +1,5 @@
-from typing import List
+from functools import lru_cache
+from typing import List, Tuple
 import xml.etree.ElementTree as ET
 
 from .Align import Align
@@ -6,9 +7,30 @@ from .external.Code128 import code128_widths
 
 from ..labelcore.common import SVG_NAMESPACE
 from ..labelcore.GroupReplacer import RectGroupReplacer
+from ..labelcore.SharedDefs import share_def
 from .units import LengthDimension, px
 
 
+@lru_cache(maxsize=1024)
+def _code128_geometry(data: str, quiet: bool) -> Tuple[str, int]:
+    """Encodes a Code 128 barcode, returning the path commands and the total width in modules.
+    Cached, since the same data is commonly encoded on many labels."""
+    bar_widths = code128_widths(data)
+
+    if quiet:  # first bar is a dummy spacer, alternate spaces and drawn bars
+        bar_widths = [10] + bar_widths + [10]
+    else:
+        bar_widths = [0] + bar_widths + [0]
+
+    path_cmds = ""
+    for i, bar_width_dim in enumerate(bar_widths):
+        if i % 2 == 1:  # drawn bar
+            path_cmds += f"h{bar_width_dim} v1 h{-bar_width_dim} z m{bar_width_dim},0"
+        else:  # space
+            path_cmds += f"m{bar_width_dim},0"
+    return path_cmds, sum(bar_widths)
+
+
 class Code128(RectGroupReplacer):
     """
     Adds a Code 128 barcode where this rectangle-area-group is.
@@ -37,13 +59,7 @@ class Code128(RectGroupReplacer):
         self.fill = fill
 
     def process_rect(self, rect: ET.Element) -> List[ET.Element]:
-        bar_widths = code128_widths(self.data)
-
-        if self.quiet:  # first bar is a dummy spacer, alternate spaces and drawn bars
-            bar_widths = [10] + bar_widths + [10]
-        else:
-            bar_widths = [0] + bar_widths + [0]
-        total_width = sum(bar_widths)
+        path_cmds, total_width = _code128_geometry(self.data, self.quiet)
 
         x = LengthDimension.from_str(rect.attrib["x"])
         y = LengthDimension.from_str(rect.attrib["y"])
@@ -54,21 +70,16 @@ class Code128(RectGroupReplacer):
             self.thickness * total_width <= width
         ), f"{self.__class__.__name__} '{self.data}' width {(self.thickness * total_width).to_str()} >= allocated {width.to_str()}"
 
-        path_cmds = ""
-        for i, bar_width_dim in enumerate(bar_widths):
-            if i % 2 == 1:  # drawn bar
-                path_cmds += f"h{bar_width_dim} v1 h{-bar_width_dim} z m{bar_width_dim},0"
-            else:  # space
-                path_cmds += f"m{bar_width_dim},0"
-
         return [
-            ET.Element(
-                f"{SVG_NAMESPACE}path",
-                {
-                    "d": path_cmds,
-                    "fill": self.fill,
-                    "stroke": "transparent",
-                    "transform": f"translate({(x + align_x).to_str()} {y.to_str()}) scale({self.thickness.to_px()} {height.to_px()})",
-                },
+            share_def(
+                ET.Element(
+                    f"{SVG_NAMESPACE}path",
+                    {
+                        "d": path_cmds,
+                        "fill": self.fill,
+                        "stroke": "transparent",
+                        "transform": f"translate({(x + align_x).to_str()} {y.to_str()}) scale({self.thickness.to_px()} {height.to_px()})",
+                    },
+                )
             )
         ]
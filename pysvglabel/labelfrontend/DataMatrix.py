@@ -1,12 +1,28 @@
-from typing import List
+from functools import lru_cache
+from typing import List, Tuple
 import xml.etree.ElementTree as ET
 
 from ..labelcore.GroupReplacer import RectGroupReplacer
+from ..labelcore.SharedDefs import share_def
 from ..labelcore.common import SVG_NAMESPACE
 from .units import LengthDimension
 from .Align import Align
 
 
+@lru_cache(maxsize=1024)
+def _datamatrix_geometry(data: str) -> Tuple[str, int, int]:
+    """Encodes a DataMatrix, returning the path commands and the matrix width and height in modules.
+    Cached, since the same data is commonly encoded on many labels."""
+    from ppf.datamatrix import DataMatrix  # type: ignore
+
+    datamatrix = DataMatrix(data)
+    path_cmds = "".join(datamatrix._svg_path_iterator())
+    # last move adds a newline which messes with the bounding box, so delete it
+    trailing_newline_index = path_cmds.rfind("m")
+    path_cmds = path_cmds[:trailing_newline_index]
+    return path_cmds, len(datamatrix.matrix[0]), len(datamatrix.matrix)
+
+
 class DataMatrix(RectGroupReplacer):
     """
     Adds a DataMatrix 2d barcode where this rectangle-area-group is.
@@ -29,20 +45,12 @@ class DataMatrix(RectGroupReplacer):
         self.fill = fill
 
     def process_rect(self, rect: ET.Element) -> List[ET.Element]:
-        from ppf.datamatrix import DataMatrix  # type: ignore
-
-        datamatrix = DataMatrix(self.data)
-        path_cmds = "".join(datamatrix._svg_path_iterator())
-        # last move adds a newline which messes with the bounding box, so delete it
-        trailing_newline_index = path_cmds.rfind("m")
-        path_cmds = path_cmds[:trailing_newline_index]
+        path_cmds, data_width, data_height = _datamatrix_geometry(self.data)
 
         x = LengthDimension.from_str(rect.attrib["x"])
         y = LengthDimension.from_str(rect.attrib["y"])
         width = LengthDimension.from_str(rect.attrib["width"])
         height = LengthDimension.from_str(rect.attrib["height"])
-        data_width = len(datamatrix.matrix[0])
-        data_height = len(datamatrix.matrix)
         align_x, align_y = Align.to_transform(
             self.align, (self.size * data_width, self.size * data_height), (width, height)
         )
@@ -51,13 +59,15 @@ class DataMatrix(RectGroupReplacer):
         ), f"{self.__class__.__name__} {self.data} with {data_width}x{data_height} matrix overflowed"
 
         return [
-            ET.Element(
-                f"{SVG_NAMESPACE}path",
-                {
-                    "d": f"M0,0.5 {path_cmds}",
-                    "stroke": self.fill,
-                    "stroke-width": "1",
-                    "transform": f"translate({(x + align_x).to_str()} {(y + align_y).to_str()}) scale({self.size.to_px()})",
-                },
+            share_def(
+                ET.Element(
+                    f"{SVG_NAMESPACE}path",
+                    {
+                        "d": f"M0,0.5 {path_cmds}",
+                        "stroke": self.fill,
+                        "stroke-width": "1",
+                        "transform": f"translate({(x + align_x).to_str()} {(y + align_y).to_str()}) scale({self.size.to_px()})",
+                    },
+                )
             )
         ]
@@ -41,3 +41,32 @@ class LabelSheet:
 
     def labels_per_sheet(self) -> int:
         return self.count[0] * self.count[1]
+
+    def slot_positions(self) -> Tuple[Tuple[int, int], ...]:
+        """Returns the (column, row) grid position of each label slot, in the order labels fill the sheet,
+        with flip_x and vertical applied."""
+        positions = []
+        for slot in range(self.labels_per_sheet()):
+            if self.vertical:
+                pos_x, pos_y = divmod(slot, self.count[1])
+            else:
+                pos_y, pos_x = divmod(slot, self.count[0])
+            if self.flip_x:
+                pos_x = self.count[0] - 1 - pos_x
+            positions.append((pos_x, pos_y))
+        return tuple(positions)
+
+    def slot_transforms(
+        self, label_size: Tuple[LengthDimension, LengthDimension], viewbox_scale: Tuple[float, float] = (1.0, 1.0)
+    ) -> Tuple[str, ...]:
+        """Returns the SVG transform attribute positioning a label of label_size at each slot, in fill order.
+        viewbox_scale is the factor to get from px to user units of the sheet, see SvgTemplate."""
+        margin_x, margin_y = self.get_margins(label_size)
+        transforms = []
+        for pos_x, pos_y in self.slot_positions():
+            offset_x = margin_x + (label_size[0] + self.space[0]) * pos_x
+            offset_y = margin_y + (label_size[1] + self.space[1]) * pos_y
+            transforms.append(
+                f"translate({offset_x.to_px() * viewbox_scale[0]}, {offset_y.to_px() * viewbox_scale[1]})"
+            )
+        return tuple(transforms)
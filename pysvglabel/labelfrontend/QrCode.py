@@ -1,11 +1,46 @@
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 import xml.etree.ElementTree as ET
 
 from ..labelcore.GroupReplacer import RectGroupReplacer
+from ..labelcore.SharedDefs import share_def
+from ..labelcore.common import SVG_NAMESPACE
 from .units import LengthDimension
 from .Align import Align
 
 
+@lru_cache(maxsize=1024)
+def _qr_geometry(data: str, border: Optional[int], error_correction: Optional[int]) -> Tuple[str, int]:
+    """Encodes a QR code, returning the path commands (in modules, including the border) and the matrix size
+    in modules. Cached, since the same data is commonly encoded on many labels."""
+    import qrcode  # type: ignore
+
+    kwargs = {}
+    if border is not None:
+        kwargs["border"] = border
+    if error_correction is not None:
+        kwargs["error_correction"] = error_correction
+
+    qr = qrcode.QRCode(version=None, **kwargs)
+    qr.add_data(data)
+    qr.make(fit=True)
+    matrix: List[List[bool]] = qr.get_matrix()
+
+    # build the path directly from the matrix, as one rectangle per horizontal run of modules
+    path_cmds = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < len(row):
+            if row[x]:
+                run_start = x
+                while x < len(row) and row[x]:
+                    x += 1
+                path_cmds.append(f"M{run_start},{y}h{x - run_start}v1h{run_start - x}z")
+            else:
+                x += 1
+    return "".join(path_cmds), len(matrix)
+
+
 class QrCode(RectGroupReplacer):
     """
     Adds a QR code where this rectangle-area-group is.
@@ -37,32 +72,13 @@ class QrCode(RectGroupReplacer):
         self.error_correction = error_correction
 
     def process_rect(self, rect: ET.Element) -> List[ET.Element]:
-        import qrcode.image.svg  # type: ignore
-
-        kwargs = {}
-        if self.border is not None:
-            kwargs["border"] = self.border
-        if self.error_correction is not None:
-            kwargs["error_correction"] = self.error_correction
-
-        qr = qrcode.QRCode(
-            version=None,
-            box_size=10,  # the code says =1mm, but actually =1px
-            image_factory=qrcode.image.svg.SvgPathImage,
-            **kwargs,
-        )
-        qr.add_data(self.data)
-        qr.make(fit=True)
-
-        # qrcode internally is dynamically lxml or xml, so serialize and deserialize to standardize
-        svg_str = qr.make_image().to_string(encoding="unicode")
-        path = ET.fromstring(svg_str)[0]  # type: ET.Element
+        path_cmds, data_width = _qr_geometry(self.data, self.border, self.error_correction)
 
         x = LengthDimension.from_str(rect.attrib["x"])
         y = LengthDimension.from_str(rect.attrib["y"])
         width = LengthDimension.from_str(rect.attrib["width"])
         height = LengthDimension.from_str(rect.attrib["height"])
-        data_height = data_width = len(qr.get_matrix())
+        data_height = data_width
         align_x, align_y = Align.to_transform(
             self.align, (self.size * data_width, self.size * data_height), (width, height)
         )
@@ -70,12 +86,18 @@ class QrCode(RectGroupReplacer):
             self.size * data_width <= width and self.size * data_height < height
         ), f"{self.__class__.__name__} {self.data} with {data_width}x{data_height} matrix overflowed"
 
-        assert "transform" not in path.attrib  # make sure it doesn't exist before it gets overwritten
-        path.attrib["transform"] = (
-            f"translate({(x + align_x).to_str()} {(y + align_y).to_str()}) scale({self.size.to_px()})"
-        )
-
-        assert "fill" in path.attrib
-        path.attrib["fill"] = self.fill
-
-        return [path]
+        return [
+            share_def(
+                ET.Element(
+                    f"{SVG_NAMESPACE}path",
+                    {
+                        "d": path_cmds,
+                        "fill": self.fill,
+                        "fill-opacity": "1",
+                        "fill-rule": "nonzero",
+                        "stroke": "none",
+                        "transform": f"translate({(x + align_x).to_str()} {(y + align_y).to_str()}) scale({self.size.to_px()})",
+                    },
+                )
+            )
+        ]
@@ -2,9 +2,9 @@ from typing import List, Optional, Dict, Any
 import xml.etree.ElementTree as ET
 import os.path
 
-from ..labelcore.common import SVG_NAMESPACE
-from ..labelcore.SvgTemplate import SvgTemplate, SvgTemplateInstance
+from ..labelcore.SvgTemplate import SvgTemplate, resolve_path
 from ..labelcore.GroupReplacer import RectGroupReplacer
+from ..labelcore.SvgCache import svg_cache
 
 from .Align import Align
 from .Scaling import Scaling
@@ -28,7 +28,7 @@ class Subtemplate(RectGroupReplacer):
         """
         assert isinstance(filename, str) or filename is None
         if filename is not None:
-            filename = os.path.abspath(filename)  # take the abspath here to encapsulate working directory
+            filename = resolve_path(filename)  # resolve against the template directory here, not the os cwd
         self.filename = filename
         self.env = env
         self.scaling = scaling
@@ -38,23 +38,19 @@ class Subtemplate(RectGroupReplacer):
         if self.filename is None:
             return []
 
-        svg = ET.parse(self.filename).getroot()
-        assert svg.tag == f"{SVG_NAMESPACE}svg", f"loaded file {self.filename} root tag is not svg, got {svg.tag}"
-        assert "width" in svg.attrib and "height" in svg.attrib, f"loaded svg {self.filename} missing width or height"
+        template = svg_cache.get_template(self.filename)
         rect_xy = (LengthDimension.from_str(rect.attrib["x"]), LengthDimension.from_str(rect.attrib["y"]))
         rect_wh = (LengthDimension.from_str(rect.attrib["width"]), LengthDimension.from_str(rect.attrib["height"]))
 
-        dirpath = os.path.dirname(self.filename)
-
-        instance_env = SvgTemplate._create_env(os.path.dirname(self.filename))
-        instance_env.update(
+        instance_env = SvgTemplate.subtemplate_env(
+            os.path.dirname(self.filename),
             {
                 "_area_width": rect_wh[0],
                 "_area_height": rect_wh[1],
-            }
+            },
         )
         instance_env.update(self.env)
 
-        svg = SvgTemplateInstance(svg, dirpath).apply_instance(instance_env)
+        svg = template.apply_instance(instance_env)
 
         return [Svg._apply(svg, rect_xy, rect_wh, self.scaling, self.align)]
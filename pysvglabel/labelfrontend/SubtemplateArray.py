@@ -3,8 +3,9 @@ import xml.etree.ElementTree as ET
 import os.path
 
 from ..labelcore.common import SVG_NAMESPACE
-from ..labelcore.SvgTemplate import SvgTemplate, SvgTemplateInstance
+from ..labelcore.SvgTemplate import SvgTemplate, resolve_path
 from ..labelcore.GroupReplacer import RectGroupReplacer
+from ..labelcore.SvgCache import svg_cache
 
 from .Align import Align
 from .Scaling import Scaling
@@ -36,7 +37,7 @@ class SubtemplateArray(RectGroupReplacer):
         """
         assert isinstance(filename, str) or filename is None
         if filename is not None:
-            filename = os.path.abspath(filename)  # take the abspath here to encapsulate working directory
+            filename = resolve_path(filename)  # resolve against the template directory here, not the os cwd
         self.filename = filename
         self.elts_env = elts_env
         self.vertical = vertical
@@ -46,21 +47,16 @@ class SubtemplateArray(RectGroupReplacer):
         if self.filename is None:
             return []
 
-        svg = ET.parse(self.filename).getroot()
-        assert svg.tag == f"{SVG_NAMESPACE}svg", f"loaded file {self.filename} root tag is not svg, got {svg.tag}"
-        assert "width" in svg.attrib and "height" in svg.attrib, f"loaded svg {self.filename} missing width or height"
+        template = svg_cache.get_template(self.filename)
         area_xy = (LengthDimension.from_str(rect.attrib["x"]), LengthDimension.from_str(rect.attrib["y"]))
         area_wh = (LengthDimension.from_str(rect.attrib["width"]), LengthDimension.from_str(rect.attrib["height"]))
 
-        dirpath = os.path.dirname(self.filename)
-        template = SvgTemplateInstance(svg, dirpath)
-
-        base_env = SvgTemplate._create_env(os.path.dirname(self.filename))
-        base_env.update(
+        base_env = SvgTemplate.subtemplate_env(
+            os.path.dirname(self.filename),
             {
                 "_area_width": area_wh[0],
                 "_area_height": area_wh[1],
-            }
+            },
         )
         outs = []
         for pos, env in self.elts_env:
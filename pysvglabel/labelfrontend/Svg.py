@@ -1,9 +1,11 @@
 from typing import List, Optional, Tuple
 import xml.etree.ElementTree as ET
-import os.path
 
 from ..labelcore.common import SVG_NAMESPACE
 from ..labelcore.GroupReplacer import RectGroupReplacer
+from ..labelcore.SvgCache import svg_cache
+from ..labelcore.SharedDefs import share_def
+from ..labelcore.SvgTemplate import resolve_path
 
 from .Align import Align
 from .Scaling import Scaling
@@ -23,7 +25,7 @@ class Svg(RectGroupReplacer):
         """
         assert isinstance(filename, str) or filename is None
         if filename is not None:
-            filename = os.path.abspath(filename)  # take the abspath here to encapsulate working directory
+            filename = resolve_path(filename)  # resolve against the template directory here, not the os cwd
         self.filename = filename
         self.scaling = scaling
         self.align = align
@@ -50,7 +52,7 @@ class Svg(RectGroupReplacer):
 
         transformer = ET.Element(f"{SVG_NAMESPACE}g")
         transformer.attrib["transform"] = f"translate({sub_x.to_str()}, {sub_y.to_str()})"
-        transformer.append(sub)
+        transformer.append(share_def(sub))
         if (wscale, hscale) != (1.0, 1.0):
             transformer.attrib["transform"] += f" scale({wscale}, {hscale})"
         return transformer
@@ -59,9 +61,7 @@ class Svg(RectGroupReplacer):
         if self.filename is None:
             return []
 
-        svg = ET.parse(self.filename).getroot()
-        assert svg.tag == f"{SVG_NAMESPACE}svg", f"loaded file {self.filename} root tag is not svg, got {svg.tag}"
-        assert "width" in svg.attrib and "height" in svg.attrib, f"loaded svg {self.filename} missing width or height"
+        svg = svg_cache.get(self.filename)
         rect_xy = (LengthDimension.from_str(rect.attrib["x"]), LengthDimension.from_str(rect.attrib["y"]))
         rect_wh = (LengthDimension.from_str(rect.attrib["width"]), LengthDimension.from_str(rect.attrib["height"]))
         return [self._apply(svg, rect_xy, rect_wh, self.scaling, self.align)]
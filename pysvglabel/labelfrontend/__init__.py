@@ -1,22 +1,49 @@
 # This package is implicitly imported for all labels
+# Exports are imported on first use (see lazy_exports), so templates only load the frontend modules they use
+from typing import TYPE_CHECKING
 
-from .units import inch, mm, cm, pt, px
-from .Align import Align
-from .Scaling import Scaling
-from .LabelSheet import LabelSheet
+from ..labelcore.lazy import lazy_exports
 
-from .Compose import Compose
-from .StyleModifier import StyleModifier, FillColor, StrokeColor
-from .Hide import Hide
-from .DimensionModifier import DimensionModifier
+if TYPE_CHECKING:
+    from .units import inch, mm, cm, pt, px
+    from .paths import resolve_path
+    from .Align import Align
+    from .Scaling import Scaling
+    from .LabelSheet import LabelSheet
 
-from .Svg import Svg
-from .Subtemplate import Subtemplate
-from .SubtemplateArray import SubtemplateArray
+    from .Compose import Compose
+    from .StyleModifier import StyleModifier, FillColor, StrokeColor
+    from .Hide import Hide
+    from .DimensionModifier import DimensionModifier
 
-from .Code128 import Code128
-from .QrCode import QrCode
-from .DataMatrix import DataMatrix
+    from .Svg import Svg
+    from .Subtemplate import Subtemplate
+    from .SubtemplateArray import SubtemplateArray
+
+    from .Code128 import Code128
+    from .QrCode import QrCode
+    from .DataMatrix import DataMatrix
+
+lazy_exports(
+    __name__,
+    {
+        "units": ["inch", "mm", "cm", "pt", "px"],
+        "paths": ["resolve_path"],
+        "Align": ["Align"],
+        "Scaling": ["Scaling"],
+        "LabelSheet": ["LabelSheet"],
+        "Compose": ["Compose"],
+        "StyleModifier": ["StyleModifier", "FillColor", "StrokeColor"],
+        "Hide": ["Hide"],
+        "DimensionModifier": ["DimensionModifier"],
+        "Svg": ["Svg"],
+        "Subtemplate": ["Subtemplate"],
+        "SubtemplateArray": ["SubtemplateArray"],
+        "Code128": ["Code128"],
+        "QrCode": ["QrCode"],
+        "DataMatrix": ["DataMatrix"],
+    },
+)
 
 __all__ = [
     "inch",
@@ -24,6 +51,7 @@ __all__ = [
     "cm",
     "pt",
     "px",
+    "resolve_path",
     "Align",
     "Scaling",
     "LabelSheet",
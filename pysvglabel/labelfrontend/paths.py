@@ -0,0 +1,5 @@
+# template code runs with the os cwd unchanged (except for the init and end blocks), so files relative to the
+# template are opened through resolve_path
+from ..labelcore.SvgTemplate import resolve_path
+
+__all__ = ["resolve_path"]
@@ -1,10 +1,13 @@
-from functools import total_ordering
+from functools import lru_cache, total_ordering
 from typing import Tuple, overload, Union, Any
 import re
 
 
 class LengthUnit:
-    """Defines a unit of length, which a number can be multiplied by to provide a length dimension."""
+    """Defines a unit of length, which a number can be multiplied by to provide a length dimension.
+    Units are compared by identity, so the module-level units are used everywhere (including when parsing)."""
+
+    __slots__ = ("svg_unit", "pixels")
 
     def __init__(self, svg_unit: str, pixels: float):
         self.svg_unit = svg_unit
@@ -41,6 +44,11 @@ px = LengthUnit("", 1)
 
 @total_ordering
 class LengthDimension:
+    """A length, as a value in some unit. The equivalent length in pixels is computed once on construction,
+    so instances must be treated as immutable, and parsed instances may be shared (see from_str)."""
+
+    __slots__ = ("value", "unit", "_px")
+
     STR_TO_UNITS = {
         "in": inch,
         "mm": mm,
@@ -51,24 +59,20 @@ class LengthDimension:
 
     @classmethod
     def from_str(cls, input: str) -> "LengthDimension":
-        match = cls.FROM_STR_RE.match(input)
-        assert match, f"can't parse length dimension '{input}'"
-        value = float(match.group(1))
-        if match.group(2):
-            units = cls.STR_TO_UNITS[match.group(2)]
-        else:
-            units = px
-        return value * units
+        """Parses a length from a SVG attribute string. Results are cached, since the same attribute strings
+        (eg, from a template's rects) are parsed for every label."""
+        return _parse_length(input)
 
     def __init__(self, value: float, unit: LengthUnit):
         self.value = value
         self.unit = unit
+        self._px = value * unit.pixels
 
     def to_str(self) -> str:
         return f"{self.value}{self.unit.svg_unit}"
 
     def to_px(self) -> float:
-        return self.value * self.unit.pixels
+        return self._px
 
     def __add__(self, other: "LengthDimension") -> "LengthDimension":
         if self.unit != other.unit:  # fall back to pixels
@@ -90,12 +94,24 @@ class LengthDimension:
 
     def __eq__(self, other: Any) -> bool:
         if isinstance(other, LengthDimension):
-            return self.to_px() == other.to_px()
+            return self._px == other._px
         else:
             return False
 
     def __lt__(self, other: "LengthDimension") -> bool:
-        return self.to_px() < other.to_px()
+        return self._px < other._px
+
+
+@lru_cache(maxsize=4096)
+def _parse_length(input: str) -> LengthDimension:
+    match = LengthDimension.FROM_STR_RE.match(input)
+    assert match, f"can't parse length dimension '{input}'"
+    value = float(match.group(1))
+    if match.group(2):
+        units = LengthDimension.STR_TO_UNITS[match.group(2)]
+    else:
+        units = px
+    return value * units
 
 
 AreaDimension = Tuple[LengthDimension, LengthDimension]
@@ -0,0 +1,158 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from types import TracebackType
+from typing import Optional, Tuple, Type
+
+# inotify constants, from sys/inotify.h
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_CLOEXEC = 0o2000000
+_INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len, followed by the name
+
+
+class FileWatcher:
+    """
+    Waits for changes to a file, using inotify on Linux and polling its modification time elsewhere.
+
+    The file's directory is watched (rather than the file itself), so saves that write a temporary file
+    and atomically rename it over the original are detected, as are files that are deleted and recreated.
+    Changes are debounced: a change is only reported once the file has had no further changes for the debounce
+    window, so a file being written in several steps is reported once it is complete.
+    """
+
+    def __init__(
+        self, filename: str, debounce: float = 0.25, poll_interval: float = 0.5, use_inotify: bool = True
+    ) -> None:
+        """
+        :param filename: file to watch, which need not exist yet
+        :param debounce: seconds without further changes before a change is reported
+        :param poll_interval: seconds between checks, when polling
+        :param use_inotify: whether to use inotify where available, otherwise always polls
+        """
+        self.filename = os.path.abspath(filename)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._reported = self._signature()  # signature of the file as of the last reported change
+        self._polled = self._reported  # signature of the file as of the last poll
+        self._inotify_fd: Optional[int] = None
+        if use_inotify and sys.platform.startswith("linux"):
+            self._inotify_fd = self._inotify_init()
+
+    def _inotify_init(self) -> Optional[int]:
+        """Starts watching the file's directory with inotify, returning its file descriptor,
+        or None if inotify is unavailable."""
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(_IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        mask = (
+            _IN_MODIFY
+            | _IN_CLOSE_WRITE
+            | _IN_MOVED_FROM
+            | _IN_MOVED_TO
+            | _IN_CREATE
+            | _IN_DELETE
+            | _IN_DELETE_SELF
+            | _IN_MOVE_SELF
+        )
+        if libc.inotify_add_watch(fd, os.path.dirname(self.filename).encode(), mask) < 0:
+            os.close(fd)
+            return None
+        return int(fd)
+
+    def _signature(self) -> Optional[Tuple[int, int, int]]:
+        """Returns a signature of the file's contents (by modification time, size, and inode, to detect
+        replacement by rename), or None if it does not exist."""
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _wait_event(self, timeout: Optional[float]) -> bool:
+        """Waits up to timeout (or indefinitely if None) for an event that may be a change to the file,
+        returning whether there was one."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self._inotify_fd is not None:
+                readable, _, _ = select.select([self._inotify_fd], [], [], remaining)
+                if not readable:
+                    return False
+                if self._read_inotify():
+                    return True
+            else:
+                signature = self._signature()
+                if signature != self._polled:
+                    self._polled = signature
+                    return True
+                if remaining is not None and remaining <= 0:
+                    return False
+                time.sleep(self.poll_interval if remaining is None else min(self.poll_interval, remaining))
+
+    def _read_inotify(self) -> bool:
+        """Reads pending inotify events, returning whether any may be a change to the file."""
+        assert self._inotify_fd is not None
+        data = os.read(self._inotify_fd, 64 * 1024)
+        basename = os.fsencode(os.path.basename(self.filename))
+        relevant = False
+        offset = 0
+        while offset < len(data):
+            _, mask, _, name_len = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            name = data[offset : offset + name_len].rstrip(b"\0")
+            offset += name_len
+            if mask & (_IN_IGNORED | _IN_DELETE_SELF | _IN_MOVE_SELF):  # directory gone, fall back to polling
+                os.close(self._inotify_fd)
+                self._inotify_fd = None
+                return True
+            if mask & _IN_Q_OVERFLOW or name == basename:
+                relevant = True
+        return relevant
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits up to timeout (or indefinitely if None) for the file to change and settle,
+        returning whether it changed. Changes that leave the file deleted are not reported."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self._wait_event(remaining):
+                return False
+            while self._wait_event(self.debounce):  # wait for the file to settle
+                pass
+            signature = self._signature()
+            if signature is not None and signature != self._reported:
+                self._reported = signature
+                return True
+
+    def close(self) -> None:
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+
+    def __enter__(self) -> "FileWatcher":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
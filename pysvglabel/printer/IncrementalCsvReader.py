@@ -0,0 +1,89 @@
+import codecs
+import csv
+import hashlib
+import io
+import locale
+import os
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+
+class IncrementalCsvReader:
+    """
+    Reads a CSV file (as with csv.DictReader) repeatedly as it changes, parsing only the rows appended since the
+    last read in the common case of a file that only grows, like a log of labels to print.
+
+    Appends are detected by the file not being shorter and the bytes read so far being unchanged, as checked against
+    a hash of them (which, while the file is appended to, is cheaper than parsing it).
+    Otherwise (eg, an earlier row was edited), the whole file is re-read.
+    """
+
+    _CHUNK_SIZE = 1024 * 1024  # for hashing
+
+    def __init__(self, filename: str, encoding: Optional[str] = None) -> None:
+        """
+        :param filename: CSV file to read
+        :param encoding: text encoding of the file, by default the same as open()
+        """
+        self.filename = filename
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.rows: List[Dict[str, str]] = []  # all rows as of the last read
+        self._fieldnames: Optional[Sequence[str]] = None
+        self._offset = 0  # position up to which the file has been read
+        self._hash = hashlib.sha256()  # of the file up to _offset
+        self._stat: Optional[Tuple[int, int]] = None  # file (size, modification time) as of the last read
+        self._complete = True  # whether the data read so far ends at a line boundary
+
+    def read(self) -> Tuple[List[Dict[str, str]], bool]:
+        """Reads changes to the file, returning (rows, reloaded).
+        If rows were only appended since the last read, rows are the appended rows and reloaded is False.
+        Otherwise, the whole file is re-read, rows are all rows, and reloaded is True.
+        Either way, all rows are available in self.rows afterwards."""
+        with open(self.filename, "rb") as file:
+            stat = os.fstat(file.fileno())
+            size = stat.st_size
+            if (size, stat.st_mtime_ns) == self._stat:  # unchanged
+                return [], False
+            self._stat = (size, stat.st_mtime_ns)
+            if self._is_appended(file, size):
+                file.seek(self._offset)
+                rows = self._parse(file.read(size - self._offset))
+                self.rows.extend(rows)
+                return rows, False
+            else:
+                self._fieldnames = None
+                self._offset = 0
+                self._hash = hashlib.sha256()
+                self._complete = True
+                file.seek(0)
+                self.rows = self._parse(file.read())
+                return list(self.rows), True
+
+    def _is_appended(self, file: BinaryIO, size: int) -> bool:
+        if self._fieldnames is None or size < self._offset:
+            return False
+        if size > self._offset and not self._complete:  # the last line read may have been partially written
+            return False
+        file_hash = hashlib.sha256()
+        remaining = self._offset
+        while remaining > 0:
+            chunk = file.read(min(remaining, self._CHUNK_SIZE))
+            if not chunk:
+                return False
+            file_hash.update(chunk)
+            remaining -= len(chunk)
+        return file_hash.digest() == self._hash.digest()
+
+    def _parse(self, data: bytes) -> List[Dict[str, str]]:
+        """Parses rows from data read from the current offset, updating the read state."""
+        # a partially written last line may end in part of a character, which is left out
+        text = codecs.getincrementaldecoder(self.encoding)().decode(data, final=False)
+        reader = csv.DictReader(io.StringIO(text, newline=""), fieldnames=self._fieldnames)
+        rows = list(reader)
+        if self._fieldnames is None and reader.fieldnames is not None:
+            self._fieldnames = list(reader.fieldnames)
+
+        self._offset += len(data)
+        self._hash.update(data)
+        if data:
+            self._complete = data.endswith(b"\n")
+        return rows
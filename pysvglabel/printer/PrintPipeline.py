@@ -0,0 +1,153 @@
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from types import TracebackType
+from typing import Any, Callable, Dict, List, Optional, Type
+
+logger = logging.getLogger(__name__)
+
+
+class _PrintJob:
+    def __init__(self, job_id: int, name: str, payload: Any, work_dir: str) -> None:
+        self.job_id = job_id
+        self.name = name
+        self.payload = payload
+        self.svg_filename = os.path.join(work_dir, f"label_{job_id}.svg")
+        self.pdf_filename = os.path.join(work_dir, f"label_{job_id}.pdf")
+        self.times: Dict[str, float] = {"submit": time.monotonic()}  # stage event -> time
+
+
+class PrintPipeline:
+    """
+    Renders, converts, and prints labels in a pipeline, with each stage on its own thread and bounded queues
+    between stages, so later labels are rendered and converted while earlier labels print.
+
+    Each job has its own files in a private working directory, which are removed once printed.
+    Labels are printed in submission order. A job that fails in any stage is logged and dropped.
+    Queue depths and per-stage latencies are logged at INFO level.
+    """
+
+    def __init__(
+        self,
+        render: Callable[[Any, str], None],
+        convert: Callable[[str, str], None],
+        print_file: Callable[[str], None],
+        queue_size: int = 2,
+    ) -> None:
+        """
+        :param render: writes the label SVG for a job payload to a filename
+        :param convert: converts a SVG filename to a PDF filename, returning once complete
+        :param print_file: prints a PDF filename, returning once the file is no longer needed
+        :param queue_size: maximum jobs waiting for each stage, beyond which submit blocks
+        """
+        self._render = render
+        self._convert = convert
+        self._print_file = print_file
+        self.work_dir = tempfile.mkdtemp(prefix="pysvglabel-print-")
+        self._next_id = 0
+        self._render_queue: "queue.Queue[Optional[_PrintJob]]" = queue.Queue(queue_size)
+        self._convert_queue: "queue.Queue[Optional[_PrintJob]]" = queue.Queue(queue_size)
+        self._print_queue: "queue.Queue[Optional[_PrintJob]]" = queue.Queue(queue_size)
+        self._threads = [
+            threading.Thread(target=self._run_stage, args=stage, daemon=True)
+            for stage in [
+                ("render", self._render_queue, self._convert_queue, self._do_render),
+                ("convert", self._convert_queue, self._print_queue, self._do_convert),
+                ("print", self._print_queue, None, self._do_print),
+            ]
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _depths(self) -> str:
+        return (
+            f"render={self._render_queue.qsize()} convert={self._convert_queue.qsize()}"
+            + f" print={self._print_queue.qsize()}"
+        )
+
+    def submit(self, payload: Any, name: str = "") -> None:
+        """Queues a label to be rendered (by render) and printed, blocking while the render queue is full."""
+        job = _PrintJob(self._next_id, name, payload, self.work_dir)
+        self._next_id += 1
+        self._render_queue.put(job)
+        logger.info(f"Queued label {job.job_id} {name}, queue depths {self._depths()}")
+
+    def _do_render(self, job: _PrintJob) -> None:
+        self._render(job.payload, job.svg_filename)
+
+    def _do_convert(self, job: _PrintJob) -> None:
+        self._convert(job.svg_filename, job.pdf_filename)
+
+    def _do_print(self, job: _PrintJob) -> None:
+        try:
+            self._print_file(job.pdf_filename)
+        finally:
+            self._remove_files(job)
+
+    @staticmethod
+    def _remove_files(job: _PrintJob) -> None:
+        """Removes the intermediate files of a job that was printed or dropped."""
+        for filename in [job.svg_filename, job.pdf_filename]:
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    def _run_stage(
+        self,
+        stage: str,
+        in_queue: "queue.Queue[Optional[_PrintJob]]",
+        out_queue: "Optional[queue.Queue[Optional[_PrintJob]]]",
+        process: Callable[[_PrintJob], None],
+    ) -> None:
+        while True:
+            job = in_queue.get()
+            if job is None:  # shutdown, propagated through the following stages
+                if out_queue is not None:
+                    out_queue.put(None)
+                return
+            job.times[f"{stage}_start"] = time.monotonic()
+            try:
+                process(job)
+            except Exception:
+                logger.exception(f"Label {job.job_id} {job.name} failed to {stage}")
+                self._remove_files(job)
+                continue
+            job.times[f"{stage}_end"] = time.monotonic()
+            if out_queue is not None:
+                out_queue.put(job)
+            else:
+                logger.info(f"Printed label {job.job_id} {job.name}, {self._latencies(job)}")
+
+    @staticmethod
+    def _latencies(job: _PrintJob) -> str:
+        """Returns the time each stage of a completed job took, and how long it waited for each stage."""
+        latencies: List[str] = []
+        previous_end = job.times["submit"]
+        for stage in ["render", "convert", "print"]:
+            waited = job.times[f"{stage}_start"] - previous_end
+            took = job.times[f"{stage}_end"] - job.times[f"{stage}_start"]
+            latencies.append(f"{stage} {took:.3f}s (queued {waited:.3f}s)")
+            previous_end = job.times[f"{stage}_end"]
+        latencies.append(f"total {previous_end - job.times['submit']:.3f}s")
+        return ", ".join(latencies)
+
+    def close(self) -> None:
+        """Waits for all queued labels to print, then stops the pipeline."""
+        self._render_queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def __enter__(self) -> "PrintPipeline":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
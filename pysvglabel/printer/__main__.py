@@ -1,15 +1,17 @@
 import argparse
+import logging
 import os
-import csv
 import xml.etree.ElementTree as ET
-import time
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 import win32com.shell.shell as shell  # type: ignore
 import win32event  # type: ignore
 
 from .. import SvgTemplate
-from ..labelcore.InkscapeSubprocess import InkscapeSubprocess
+from ..labelcore.InkscapePool import InkscapePool
+from .FileWatcher import FileWatcher
+from .IncrementalCsvReader import IncrementalCsvReader
+from .PrintPipeline import PrintPipeline
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -18,6 +20,12 @@ if __name__ == "__main__":
     parser.add_argument("printer", type=str, help="Printer name to print to.", default="ZDesigner GX430t")
     parser.add_argument("template", type=str, help="Input SVG template file.")
     parser.add_argument("csv", type=str, help="Input CSV data file to monitor for changes on.")
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.25,
+        help="Seconds the CSV file must be unchanged after a change before it is read, so partial writes aren't read.",
+    )
     # TODO: support user-defineable generated filename
     args = parser.parse_args()
 
@@ -27,55 +35,60 @@ if __name__ == "__main__":
         # Discard empty cells - to not print everything is a new row is added
         return tuple(sorted([(k, v) for (k, v) in row_dict.items() if v]))
 
-    inkscape = InkscapeSubprocess()
-
-    last_mod_time = None  # None means initial read, and to not print anything
-    last_seen_set = set()
-    while True:
-        if not os.path.isfile(args.csv):
-            print("Warning: file not found")
-            continue
+    inkscape = InkscapePool()
 
-        try:
-            mod_time = os.path.getmtime(args.csv)
-        except FileNotFoundError:
-            continue  # sometimes the file temporarily disappears, just ignore it
-        if mod_time == last_mod_time:  # file unchanged, ignore
-            continue
+    def render(job: Tuple[int, Dict[str, str], List[Dict[str, str]]], svg_filename: str) -> None:
+        row_index, row_dict, all_row_dicts = job
+        label = template._create_instance()
+        instance = template.apply_instance(row_dict, all_row_dicts, row_index)
+        label.append(instance)
+        root = ET.ElementTree(label)
+        root.write(svg_filename)
 
-        time.sleep(0.25)  # TODO HACK: wait for the file the stabilize
+    def convert(svg_filename: str, pdf_filename: str) -> None:
+        inkscape.convert(svg_filename, pdf_filename).result()  # wait for conversion
 
-        with open(args.csv, "r") as csvfile:
-            print("File modification detected")
-            reader = csv.DictReader(csvfile)
-            seen_set = set()
-            all_row_dicts = list(reader)
-            for row_index, row_dict in enumerate(all_row_dicts):
-                row_set = canonicalize_row_dict(row_dict)
-                seen_set.add(row_set)
-                if row_set not in last_seen_set and last_mod_time is not None:
-                    print(f"Printing: {row_dict}")
+    def print_file(pdf_filename: str) -> None:
+        # wait for the print to execute, so the file can then be removed
+        # https://stackoverflow.com/questions/18025882/how-to-determine-if-win32api-shellexecute-was-successful-using-hinstance
+        pinfo = shell.ShellExecuteEx(
+            fMask=256 + 64, lpVerb="print", lpFile=pdf_filename, lpParameters=f"/d:{args.printer} ."
+        )
+        win32event.WaitForSingleObject(pinfo["hProcess"], win32event.INFINITE)
 
-                    label = template._create_instance()
-                    instance = template.apply_instance(row_dict, all_row_dicts, row_index)
-                    label.append(instance)
-                    root = ET.ElementTree(label)
-                    root.write("temp.svg")
+    # labels are rendered and converted while earlier labels print
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    pipeline = PrintPipeline(render, convert, print_file)
 
-                    if os.path.exists("temp.pdf"):
-                        os.remove("temp.pdf")
-                    inkscape.convert("temp.svg", "temp.pdf")
-                    while not os.path.exists("temp.pdf"):  # wait for file creation
-                        time.sleep(0.25)
+    csv_reader = IncrementalCsvReader(args.csv)
+    last_seen_set: Optional[Set[Tuple[Tuple[str, str], ...]]] = None  # None means initial read, to not print anything
+    with FileWatcher(args.csv, debounce=args.debounce) as watcher:
+        while True:
+            if not os.path.isfile(args.csv):
+                print("Warning: file not found")
+                watcher.wait()  # until the file is created again
+                continue
 
-                    # wait for the print to execute, so we can then overwrite the file
-                    # https://stackoverflow.com/questions/18025882/how-to-determine-if-win32api-shellexecute-was-successful-using-hinstance
-                    pinfo = shell.ShellExecuteEx(
-                        fMask=256 + 64, lpVerb="print", lpFile="temp.pdf", lpParameters=f"/d:{args.printer} ."
-                    )
-                    win32event.WaitForSingleObject(pinfo["hProcess"], win32event.INFINITE)
+            print("File modification detected")
+            # usually rows are only appended, in which case only the new rows are parsed and checked
+            new_row_dicts, reloaded = csv_reader.read()
+            all_row_dicts = csv_reader.rows
+            first_row_index = len(all_row_dicts) - len(new_row_dicts)
+            new_row_sets = [canonicalize_row_dict(row_dict) for row_dict in new_row_dicts]
+            print_rows = []
+            if last_seen_set is not None:
+                for row_index, (row_dict, row_set) in enumerate(zip(new_row_dicts, new_row_sets), first_row_index):
+                    if row_set not in last_seen_set:
+                        print_rows.append((row_index, row_dict))
+            if reloaded or last_seen_set is None:
+                last_seen_set = set(new_row_sets)
+            else:
+                last_seen_set.update(new_row_sets)
 
-            last_mod_time = mod_time
-            last_seen_set = seen_set
+            if print_rows:
+                table = list(all_row_dicts)  # snapshot, since the reader extends its rows on later reads
+                for row_index, row_dict in print_rows:
+                    print(f"Printing: {row_dict}")
+                    pipeline.submit((row_index, row_dict, table), str(row_dict))
 
-        time.sleep(0.25)
+            watcher.wait()  # blocks until the file changes and its writes settle
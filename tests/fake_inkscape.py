@@ -0,0 +1,27 @@
+# stand-in for inkscape --shell in tests, which copies the input file to the export filename
+# inputs containing "crash" exit the process, and inputs containing "hang" never complete
+import shutil
+import sys
+import time
+
+
+def prompt() -> None:
+    sys.stdout.write("> ")
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    print("Inkscape interactive shell mode.")
+    prompt()
+    for line in sys.stdin:
+        actions = dict(action.split(":", 1) for action in line.strip().split(";") if ":" in action)
+        if line.strip() == "quit":
+            break
+        elif "crash" in actions["file-open"]:
+            sys.exit(1)
+        elif "hang" in actions["file-open"]:
+            time.sleep(3600)
+        elif "fail" not in actions["file-open"]:
+            shutil.copy(actions["file-open"], actions["export-filename"])
+        print()  # Inkscape may write output before the next prompt
+        prompt()
@@ -1,6 +1,7 @@
 import csv
 
 import os.path
+import xml.etree.ElementTree as ET
 from pysvglabel.labelcore import SvgTemplate
 from .LabelTestCase import LabelTestCase
 
@@ -16,3 +17,13 @@ class BarcodeTestCase(LabelTestCase):
 
         sheet = self.create_sheet(template, table)
         self.write_label(sheet)
+
+    def test_barcode_repeated(self) -> None:
+        with open(os.path.join(self.get_base_dir(), "test_simple.csv"), newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            table = [row for row in reader]
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "test_barcode.svg"))
+
+        # barcode geometry is cached, repeated data must render the same each time
+        first, second = template.render_rows(table[:1] * 2)
+        self.assertEqual(ET.tostring(first), ET.tostring(second))
@@ -0,0 +1,71 @@
+import os.path
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+from typing import Any, Dict
+
+from pysvglabel.labelcore import SvgTemplate, SvgTemplateInstance, BadTemplateException, SVG_NAMESPACE
+from pysvglabel.labelcore.SvgTemplate import fstring_source
+
+
+def text_template(*texts: str) -> ET.Element:
+    """Returns a template with a layer containing a text element (with a tspan containing the text) per text."""
+    template = ET.Element(f"{SVG_NAMESPACE}svg", {"width": "10mm", "height": "10mm"})
+    layer = ET.SubElement(template, f"{SVG_NAMESPACE}g")
+    for text in texts:
+        text_elt = ET.SubElement(layer, f"{SVG_NAMESPACE}text")
+        ET.SubElement(text_elt, f"{SVG_NAMESPACE}tspan").text = text
+    return template
+
+
+class CompileTestCase(unittest.TestCase):
+    def test_constant_folding(self) -> None:
+        template = text_template("{{escaped}} text", "{value}")
+        template[0][0][0].tail = " {{tail}}"
+        instance = SvgTemplateInstance(template, os.getcwd())
+        constant, dynamic = instance.template[0]
+
+        # constant text is evaluated once (resolving escapes) and shared, while text with substitutions is compiled
+        self.assertEqual((constant[0].text, constant[0].tail), ("{escaped} text", " {tail}"))
+        self.assertIn(constant, instance._static)
+        self.assertNotIn(constant[0], instance._text_codes)
+        self.assertNotIn(constant[0], instance._tail_codes)
+        self.assertIn(dynamic[0], instance._text_codes)
+
+        label = instance.apply_instance({"value": "1"})
+        self.assertIs(label[0][0], constant)
+        self.assertEqual(label[0][1][0].text, "1")
+        self.assertEqual(dynamic[0].text, "{value}")  # the template is unchanged
+
+    def test_substitution_parity(self) -> None:
+        # compiled text substitutes as evaluating each text as an f-string (as before compiling) does
+        texts = [
+            "plain",
+            "{id} = {description}",
+            "{{literal}} {id!r:>6}",
+            "{row['spaced thing']}",
+            '{"quoted " + id}',
+            "{len(description):03d}",
+            "{id}\n{description}",
+        ]
+        env: Dict[str, Any] = {"id": "B01", "description": "one", "row": {"spaced thing": "a b"}}
+        label = SvgTemplateInstance(text_template(*texts), os.getcwd()).apply_instance(dict(env))
+        self.assertEqual(
+            [text_elt[0].text for text_elt in label[0]], [eval(fstring_source(text), dict(env)) for text in texts]
+        )
+
+    def test_syntax_errors(self) -> None:
+        # invalid code is reported when the template is loaded, not when a label is rendered
+        with self.assertRaises(BadTemplateException):
+            SvgTemplateInstance(text_template("{value +}"), os.getcwd())
+
+        with open(os.path.join(os.path.dirname(__file__), "test_barcode.svg"), encoding="utf-8") as file:
+            source = file.read()
+        command = "🐍Code128(row['barcode'], thickness=0.254*mm)"
+        self.assertIn(command, source)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "invalid.svg")
+            with open(filename, "w", encoding="utf-8") as file:
+                file.write(source.replace(command, "🐍Code128(row['barcode'],"))
+            with self.assertRaises(BadTemplateException):
+                SvgTemplate(filename)
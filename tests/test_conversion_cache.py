@@ -0,0 +1,53 @@
+import os
+import os.path
+import tempfile
+import unittest
+from unittest import mock
+
+from pysvglabel.labelcore import ConversionCache
+
+
+class ConversionCacheTestCase(unittest.TestCase):
+    def test_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = ConversionCache(os.path.join(temp_dir, "cache"), max_bytes=120)  # two entries
+            filenames = []
+            for i in range(3):
+                filename = os.path.join(temp_dir, f"page{i}.svg")
+                with open(filename, "w") as file:
+                    file.write(f"page{i}" * 10)
+                filenames.append(filename)
+            key = cache.key(filenames[0], "1.0", ".pdf")
+            self.assertEqual(key, cache.key(filenames[0], "1.0", ".pdf"))
+            self.assertNotEqual(key, cache.key(filenames[0], "1.1", ".pdf"))  # converter version is part of the key
+            self.assertNotEqual(key, cache.key(filenames[1], "1.0", ".pdf"))
+
+            output = os.path.join(temp_dir, "out.pdf")
+            self.assertFalse(cache.fetch(key, output))
+            cache.store(key, filenames[0])
+            self.assertTrue(cache.fetch(key, output))
+            with open(output) as file:
+                self.assertEqual(file.read(), "page0" * 10)
+
+            os.utime(os.path.join(cache.directory, key), (0, 0))  # make the first entry least recently used
+            for filename in filenames[1:]:
+                cache.store(cache.key(filename, "1.0", ".pdf"), filename)
+            self.assertFalse(cache.fetch(key, output))  # evicted once over the size limit
+            self.assertTrue(cache.fetch(cache.key(filenames[2], "1.0", ".pdf"), output))
+
+    def test_cache_size_tracked(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.makedirs(os.path.join(temp_dir, "cache"))
+            with open(os.path.join(temp_dir, "cache", "existing.pdf"), "w") as file:
+                file.write("x" * 50)
+            os.utime(os.path.join(temp_dir, "cache", "existing.pdf"), (0, 0))  # least recently used
+            cache = ConversionCache(os.path.join(temp_dir, "cache"), max_bytes=120)  # existing files are counted
+            filename = os.path.join(temp_dir, "page.svg")
+            with open(filename, "w") as file:
+                file.write("page" * 10)
+
+            with mock.patch.object(os, "scandir", side_effect=AssertionError("cache directory scanned")):
+                cache.store("key1.pdf", filename)  # within the limit, so the directory isn't scanned
+                cache.store("key1.pdf", filename)  # replacing an entry doesn't count it twice
+            cache.store("key2.pdf", filename)  # over the limit, so the least recently used entry is evicted
+            self.assertEqual(sorted(os.listdir(cache.directory)), ["key1.pdf", "key2.pdf"])
@@ -0,0 +1,42 @@
+import os
+import os.path
+import tempfile
+import threading
+import time
+import unittest
+
+from pysvglabel.printer.FileWatcher import FileWatcher
+
+
+class FileWatcherTestCase(unittest.TestCase):
+    def check_watcher(self, use_inotify: bool) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "data.csv")
+            with open(filename, "w") as file:
+                file.write("a,b\n")
+            with FileWatcher(filename, debounce=0.05, poll_interval=0.01, use_inotify=use_inotify) as watcher:
+                self.assertFalse(watcher.wait(timeout=0.1))  # unchanged
+
+                def append() -> None:
+                    time.sleep(0.05)
+                    with open(filename, "a") as file:
+                        file.write("1,2\n")
+
+                thread = threading.Thread(target=append)
+                thread.start()
+                self.assertTrue(watcher.wait(timeout=5))
+                thread.join()
+
+                # editors commonly save by writing a temporary file and renaming it over the original
+                temp_filename = os.path.join(temp_dir, "data.csv.tmp")
+                with open(temp_filename, "w") as file:
+                    file.write("a,b\n1,2\n3,4\n")
+                os.replace(temp_filename, filename)
+                self.assertTrue(watcher.wait(timeout=5))
+                self.assertFalse(watcher.wait(timeout=0.1))
+
+    def test_inotify(self) -> None:
+        self.check_watcher(True)
+
+    def test_polling(self) -> None:
+        self.check_watcher(False)
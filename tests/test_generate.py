@@ -0,0 +1,57 @@
+import csv
+import os.path
+import subprocess
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+from typing import List
+
+from .LabelTestCase import LabelTestCase
+
+
+class GenerateTestCase(LabelTestCase):
+    def write_csv(self, filename: str, ids: List[str]) -> None:
+        with open(filename, "w", newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(["id", "barcode", "description", "spaced thing"])
+            for index, id in enumerate(ids):
+                writer.writerow([id, f"B{index:03d}", f"row{index:03d}", "a"])
+
+    def generate(self, csv_filename: str, output: str, jobs: int) -> "subprocess.CompletedProcess[str]":
+        return subprocess.run(
+            [sys.executable, "-m", "pysvglabel.generate"]
+            + [os.path.join(self.get_base_dir(), "simple_1.75x0.5.svg"), csv_filename, output, "--jobs", str(jobs)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            timeout=120,  # a hang fails the test instead of blocking it
+        )
+
+    def test_jobs(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_filename = os.path.join(temp_dir, "data.csv")
+            self.write_csv(csv_filename, [str(i) for i in range(200)])  # 80 labels per page, so 3 pages
+            pages = []
+            for jobs in [1, 2]:
+                output = os.path.join(temp_dir, f"out_jobs{jobs}.svg")
+                self.assertEqual(self.generate(csv_filename, output, jobs).returncode, 0)
+                page_filenames = [output, output[:-4] + "_2.svg", output[:-4] + "_3.svg"]
+                self.assertFalse(os.path.exists(output[:-4] + "_4.svg"))
+                # namespaces may be declared in different places, so pages are compared in canonical form
+                pages.append([ET.canonicalize(from_file=filename) for filename in page_filenames])
+
+        self.assertEqual(pages[0], pages[1])
+        for page_num, page in enumerate(pages[1]):  # pages are in order
+            self.assertIn(f"row{page_num * 80:03d}", page)
+            self.assertNotIn(f"row{page_num * 80 - 1:03d}", page)
+
+    def test_jobs_error(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_filename = os.path.join(temp_dir, "data.csv")
+            ids = [str(i) for i in range(200)]
+            ids[100] = "invalid"  # template code fails on the second page, in a worker process
+            self.write_csv(csv_filename, ids)
+            result = self.generate(csv_filename, os.path.join(temp_dir, "out.svg"), 2)
+
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("ValueError", result.stderr)
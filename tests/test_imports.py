@@ -0,0 +1,68 @@
+import os.path
+import subprocess
+import sys
+import unittest
+from typing import List
+
+import pysvglabel.labelcore
+from pysvglabel.labelcore import SvgTemplate
+
+
+def imported_modules(code: str) -> List[str]:
+    """Runs code in a new interpreter, returning the modules imported (in addition to those at startup)."""
+    command = [
+        sys.executable,
+        "-c",
+        "import sys; startup = set(sys.modules)\n" + code + "\nprint(' '.join(set(sys.modules) - startup))",
+    ]
+    output = subprocess.run(command, cwd=os.path.dirname(__file__), stdout=subprocess.PIPE, check=True).stdout
+    return output.decode("utf-8").split()
+
+
+class ImportsTestCase(unittest.TestCase):
+    def test_frontend_lazy(self) -> None:
+        modules = imported_modules("from pysvglabel.labelfrontend import mm")
+        self.assertIn("pysvglabel.labelfrontend.units", modules)
+        for module in [
+            "pysvglabel.labelfrontend.Code128",
+            "pysvglabel.labelfrontend.Subtemplate",
+            "pysvglabel.labelcore.SvgTemplate",
+            "pysvglabel.labelcore.InkscapePool",
+            "concurrent.futures",
+        ]:
+            self.assertNotIn(module, modules)
+
+    def test_template_lazy(self) -> None:
+        # only the frontend modules a template uses are imported
+        modules = imported_modules(
+            "from pysvglabel import SvgTemplate\n"
+            + "SvgTemplate('test_color.svg').apply_page([{'id': '0', 'description': 'zero', 'color': '#ff0000'}])"
+        )
+        self.assertIn("pysvglabel.labelfrontend.LabelSheet", modules)
+        self.assertIn("pysvglabel.labelfrontend.StyleModifier", modules)
+        for module in [
+            "pysvglabel.labelfrontend.Code128",
+            "pysvglabel.labelfrontend.QrCode",
+            "pysvglabel.labelfrontend.Subtemplate",
+            "pysvglabel.labelcore.ConversionCache",
+            "concurrent.futures",
+        ]:
+            self.assertNotIn(module, modules)
+
+    def test_exports(self) -> None:
+        import pysvglabel.labelcore.SvgTemplate  # the submodule doesn't replace the same-named export
+
+        self.assertIs(pysvglabel.labelcore.SvgTemplate, SvgTemplate)
+        self.assertIn("InkscapePool", dir(pysvglabel.labelcore))
+        with self.assertRaises(AttributeError):
+            pysvglabel.labelcore.NotDefined
+
+    def test_template_env(self) -> None:
+        template = SvgTemplate(os.path.join(os.path.dirname(__file__), "simple_1.75x0.5.svg"))
+        exec("def init_width():\n  return 2*mm", template.env)
+        env = template._layer_env(template.env, {})
+        exec("def row_width():\n  return 3*mm\nwidths = [init_width(), row_width(), [4*mm for _ in range(1)][0]]", env)
+        mm = template.env["mm"]
+        self.assertEqual(env["widths"], [2 * mm, 3 * mm, 4 * mm])
+        with self.assertRaises(NameError):
+            exec("NotDefined", env)
@@ -0,0 +1,67 @@
+import os.path
+import tempfile
+import unittest
+
+from pysvglabel.printer.IncrementalCsvReader import IncrementalCsvReader
+
+
+class IncrementalCsvReaderTestCase(unittest.TestCase):
+    def test_incremental(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "data.csv")
+            with open(filename, "w", newline="") as file:
+                file.write("id,name\r\n0,zero\r\n")
+            reader = IncrementalCsvReader(filename, encoding="utf-8")
+            self.assertEqual(reader.read(), ([{"id": "0", "name": "zero"}], True))
+            self.assertEqual(reader.read(), ([], False))  # unchanged
+
+            with open(filename, "a", newline="") as file:
+                file.write('1,"one, uno"\r\n2,two\r\n')
+            self.assertEqual(reader.read(), ([{"id": "1", "name": "one, uno"}, {"id": "2", "name": "two"}], False))
+            self.assertEqual(len(reader.rows), 3)
+
+            with open(filename, "w", newline="") as file:  # earlier content edited
+                file.write("id,name\r\n0,zero\r\n1,one\r\n2,two\r\n")
+            rows, reloaded = reader.read()
+            self.assertTrue(reloaded)
+            self.assertEqual(rows, reader.rows)
+            self.assertEqual(rows[1], {"id": "1", "name": "one"})
+
+            with open(filename, "a", newline="") as file:  # unterminated last line
+                file.write("3,th")
+            self.assertEqual(reader.read(), ([{"id": "3", "name": "th"}], False))
+            with open(filename, "a", newline="") as file:  # continued line forces a full read
+                file.write("ree\r\n")
+            rows, reloaded = reader.read()
+            self.assertTrue(reloaded)
+            self.assertEqual(rows[-1], {"id": "3", "name": "three"})
+            self.assertEqual(len(rows), 4)
+
+    def test_edit_and_append(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "data.csv")
+            rows = "".join(f"{i},row {i:04d}\r\n" for i in range(1000))  # edit is well before the end
+            with open(filename, "w", newline="") as file:
+                file.write("id,name\r\n" + rows)
+            reader = IncrementalCsvReader(filename, encoding="utf-8")
+            reader.read()
+
+            with open(filename, "w", newline="") as file:  # same-length edit of an earlier row, with an append
+                file.write("id,name\r\n" + rows.replace("0,row 0000", "0,row EDIT") + "1000,row 1000\r\n")
+            rows_read, reloaded = reader.read()
+            self.assertTrue(reloaded)
+            self.assertEqual(rows_read[0], {"id": "0", "name": "row EDIT"})
+            self.assertEqual(len(rows_read), 1001)
+
+    def test_partial_character(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "data.csv")
+            data = "id,name\r\n0,café\r\n".encode("utf-8")
+            with open(filename, "wb") as file:  # written up to within the last character
+                file.write(data[:-3])
+            reader = IncrementalCsvReader(filename, encoding="utf-8")
+            self.assertEqual(reader.read(), ([{"id": "0", "name": "caf"}], True))
+
+            with open(filename, "ab") as file:
+                file.write(data[-3:])
+            self.assertEqual(reader.read(), ([{"id": "0", "name": "café"}], True))
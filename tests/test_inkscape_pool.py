@@ -0,0 +1,60 @@
+import os.path
+import sys
+import tempfile
+import unittest
+
+from pysvglabel.labelcore.InkscapePool import InkscapeError, InkscapePool
+
+
+class InkscapePoolTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.command = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_inkscape.py")]
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def write_input(self, name: str) -> str:
+        filename = os.path.join(self.temp_dir.name, name + ".svg")
+        with open(filename, "w") as file:
+            file.write(name)
+        return filename
+
+    def test_convert(self) -> None:
+        with InkscapePool(2, command=self.command) as pool:
+            futures = [
+                pool.convert(self.write_input(f"in{i}"), os.path.join(self.temp_dir.name, f"out{i}.pdf"))
+                for i in range(6)
+            ]
+            for i, future in enumerate(futures):
+                with open(future.result(timeout=30)) as file:
+                    self.assertEqual(file.read(), f"in{i}")
+
+    def test_failures(self) -> None:
+        with InkscapePool(1, timeout=2, command=self.command) as pool:
+            failed = pool.convert(self.write_input("fail"), os.path.join(self.temp_dir.name, "fail.pdf"))
+            crashed = pool.convert(self.write_input("crash"), os.path.join(self.temp_dir.name, "crash.pdf"))
+            queued = pool.convert(self.write_input("queued"), os.path.join(self.temp_dir.name, "queued.pdf"))
+            with self.assertRaises(InkscapeError):
+                failed.result(timeout=30)
+            with self.assertRaises(InkscapeError):
+                crashed.result(timeout=30)
+            self.assertTrue(os.path.exists(queued.result(timeout=30)))  # resent to the restarted worker
+
+            hung = pool.convert(self.write_input("hang"), os.path.join(self.temp_dir.name, "hang.pdf"))
+            with self.assertRaises(TimeoutError):
+                hung.result(timeout=30)
+            ok = pool.convert(self.write_input("ok"), os.path.join(self.temp_dir.name, "ok.pdf"))
+            self.assertTrue(os.path.exists(ok.result(timeout=30)))
+
+    def test_start_failures(self) -> None:
+        command = [sys.executable, "-c", "import sys; sys.exit(3)"]  # exits without starting up
+        with InkscapePool(2, command=command, max_start_failures=2) as pool:
+            queued = [
+                pool.convert(self.write_input(f"in{i}"), os.path.join(self.temp_dir.name, f"out{i}.pdf"))
+                for i in range(4)
+            ]
+            for future in queued:
+                with self.assertRaisesRegex(InkscapeError, "code 3"):
+                    future.result(timeout=30)
+            later = pool.convert(self.write_input("later"), os.path.join(self.temp_dir.name, "later.pdf"))
+            with self.assertRaisesRegex(InkscapeError, "code 3"):
+                later.result(timeout=0)
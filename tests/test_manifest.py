@@ -0,0 +1,59 @@
+import csv
+import os
+import os.path
+import shutil
+import tempfile
+from typing import Set
+
+from pysvglabel.labelcore import Manifest, SvgTemplate
+from pysvglabel.labelcore.SvgCache import context_record_dependencies
+from .LabelTestCase import LabelTestCase
+
+
+class ManifestTestCase(LabelTestCase):
+    def test_record_dependencies(self) -> None:
+        with open(os.path.join(self.get_base_dir(), "test_subsvg.csv"), newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            table = [row for row in reader]
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "test_subsvg.svg"))
+
+        dependencies: Set[str] = set()
+        with context_record_dependencies(dependencies):
+            template.apply_page(table, workers=2)
+        self.assertIn(os.path.join(self.get_base_dir(), "sub_rect.svg"), dependencies)
+
+    def test_manifest(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            template_filename = os.path.join(temp_dir, "template.svg")
+            dependency = os.path.join(temp_dir, "sub.svg")
+            output = os.path.join(temp_dir, "out.svg")
+            manifest_filename = os.path.join(temp_dir, "out.manifest.json")
+            shutil.copy(os.path.join(self.get_base_dir(), "test_subsvg.svg"), template_filename)
+            shutil.copy(os.path.join(self.get_base_dir(), "sub_rect.svg"), dependency)
+            with open(output, "w") as file:
+                file.write("output")
+            rows_hash = Manifest.rows_hash(0, [{"a": "1"}])
+            self.assertNotEqual(rows_hash, Manifest.rows_hash(1, [{"a": "1"}]))
+
+            manifest = Manifest(manifest_filename, template_filename, {"shared_defs": False})
+            self.assertFalse(manifest.is_current("out", rows_hash, [output]))
+            manifest.record("out", rows_hash, [dependency], [output])
+            manifest.write()
+
+            manifest = Manifest(manifest_filename, template_filename, {"shared_defs": False})
+            self.assertFalse(os.path.exists(manifest_filename))  # removed until the run completes
+            self.assertTrue(manifest.is_current("out", rows_hash, [output]))
+            self.assertFalse(manifest.is_current("out", Manifest.rows_hash(0, [{"a": "2"}]), [output]))
+            manifest.write()
+
+            self.assertFalse(  # changed options invalidate all pages
+                Manifest(manifest_filename, template_filename, {"shared_defs": True}).is_current(
+                    "out", rows_hash, [output]
+                )
+            )
+            manifest.write()
+
+            with open(dependency, "a") as file:
+                file.write("<!-- modified -->")
+            manifest = Manifest(manifest_filename, template_filename, {"shared_defs": False})
+            self.assertFalse(manifest.is_current("out", rows_hash, [output]))
@@ -0,0 +1,154 @@
+import csv
+
+import os.path
+import subprocess
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+from typing import Any, List, Tuple
+from pysvglabel.labelcore import SvgTemplate, SVG_NAMESPACE, INKSCAPE_NAMESPACE, SODIPODI_NAMESPACE
+from pysvglabel.labelcore import compact, flatten_transforms, register_namespaces
+from pysvglabel.labelcore.common import XLINK_NAMESPACE
+from pysvglabel.labelcore.optimize import Matrix, parse_transform, referenced_ids
+from .LabelTestCase import LabelTestCase
+
+
+def placed_elements(elt: ET.Element, transform: str = "") -> List[Tuple[Any, ...]]:
+    """Returns the non-group elements of a tree in document order, each with its attributes (other than transform),
+    enclosing nested svg elements, and the total transform applied to it, which should be unchanged by flattening."""
+    transform = f"{transform} {elt.attrib.get('transform', '')}"
+    if elt.tag == f"{SVG_NAMESPACE}g":
+        return [placed for child in elt for placed in placed_elements(child, transform)]
+    matrix = parse_transform(transform)
+    assert matrix is not None
+    attrib = {key: value for key, value in elt.attrib.items() if key != "transform"}
+    if elt.tag == f"{SVG_NAMESPACE}svg":  # children are placed relative to the nested svg
+        return [(elt.tag, attrib, matrix, None)] + [placed for child in elt for placed in placed_elements(child)]
+    return [(elt.tag, attrib, matrix, ET.tostring(elt))]
+
+
+class OptimizeTestCase(LabelTestCase):
+    def assertMatrixAlmostEqual(self, matrix1: Matrix, matrix2: Matrix) -> None:
+        for value1, value2 in zip(matrix1, matrix2):
+            self.assertAlmostEqual(value1, value2, places=6)
+
+    def test_flatten_page(self) -> None:
+        with open(os.path.join(self.get_base_dir(), "test_subsvg.csv"), newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            table = [row for row in reader]
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "test_subsvg.svg"))
+        page = template.apply_page(table, share_static=True)
+        page_bytes = ET.tostring(page)
+
+        flattened = flatten_transforms(page, referenced_ids(template.skeleton))
+        sheet = template.create_sheet()
+        sheet.append(flattened)
+        self.write_label(sheet)
+
+        self.assertEqual(ET.tostring(page), page_bytes)  # not modified, including static content shared with labels
+        self.assertLess(len(list(flattened.iter(f"{SVG_NAMESPACE}g"))), len(list(page.iter(f"{SVG_NAMESPACE}g"))))
+        for svg in flattened.iter(f"{SVG_NAMESPACE}svg"):
+            self.assertNotIn("transform", svg.attrib)
+
+        # all elements are still placed in the same order at the same positions
+        placed = placed_elements(page)
+        flattened_placed = placed_elements(flattened)
+        self.assertEqual(len(placed), len(flattened_placed))
+        for (tag, attrib, matrix, content), (flat_tag, flat_attrib, flat_matrix, flat_content) in zip(
+            placed, flattened_placed
+        ):
+            self.assertEqual((tag, attrib, content), (flat_tag, flat_attrib, flat_content))
+            self.assertMatrixAlmostEqual(matrix, flat_matrix)
+
+    def test_flatten_kept(self) -> None:
+        root = ET.fromstring(f"""<svg xmlns="{SVG_NAMESPACE[1:-1]}" xmlns:xlink="http://www.w3.org/1999/xlink">
+              <g transform="translate(1, 2)"><g id="g1" transform="scale(2)"><rect id="rect1" /></g></g>
+              <g transform="translate(1, 2)" style="opacity: 0.5"><rect /></g>
+              <g transform="translate(1, 2)"><g id="used"><rect /></g></g>
+              <use xlink:href="#used" />
+              <g transform="translate(1, 2)"><svg width="10" height="10" /></g>
+              <g transform="translate(1, 2)" />
+              <g><rect /><circle /></g>
+            </svg>""")
+        flattened = flatten_transforms(root)
+        children = list(flattened)
+
+        self.assertEqual(children[0].tag, f"{SVG_NAMESPACE}rect")  # the chain is folded into the rect
+        self.assertEqual(children[0].attrib, {"id": "rect1", "transform": "matrix(2.0, 0.0, 0.0, 2.0, 1.0, 2.0)"})
+        self.assertEqual(children[1].attrib["style"], "opacity: 0.5")  # groups affecting rendering are kept
+        self.assertEqual(children[2].attrib["transform"], "translate(1, 2)")  # not pushed onto referenced groups
+        self.assertEqual(children[2][0].attrib, {"id": "used"})
+        self.assertEqual(children[3].tag, f"{SVG_NAMESPACE}use")
+        self.assertEqual(children[4].attrib["transform"], "translate(1, 2)")  # not pushed onto nested svg
+        self.assertNotIn("transform", children[4][0].attrib)
+        self.assertEqual([child.tag for child in children[5:]], [f"{SVG_NAMESPACE}rect", f"{SVG_NAMESPACE}circle"])
+
+    def test_flatten_shared_defs(self) -> None:
+        for jobs in ["1", "2"]:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                output = os.path.join(temp_dir, "out.svg")
+                subprocess.run(
+                    [sys.executable, "-m", "pysvglabel.generate"]
+                    + [
+                        os.path.join(self.get_base_dir(), filename)
+                        for filename in ["test_barcode.svg", "test_simple.csv"]
+                    ]
+                    + [output, "--shared_defs", "--flatten", "--jobs", jobs],
+                    stdout=subprocess.DEVNULL,
+                    check=True,
+                )
+                root = ET.parse(output).getroot()
+
+            ids = {elt.attrib["id"] for elt in root.iter() if "id" in elt.attrib}
+            hrefs = [use.attrib[f"{XLINK_NAMESPACE}href"] for use in root.iter(f"{SVG_NAMESPACE}use")]
+            self.assertTrue(hrefs)
+            for href in hrefs:  # shared definitions aren't flattened away
+                self.assertIn(href[1:], ids)
+
+    def test_compact(self) -> None:
+        with open(os.path.join(self.get_base_dir(), "test_subsvg.csv"), newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            table = [row for row in reader]
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "test_subsvg.svg"))
+        sheet = template.create_sheet()
+        sheet.append(template.apply_page(table, share_static=True))
+        sheet_bytes = ET.tostring(sheet)
+
+        compacted = compact(sheet, precision=2)
+        self.assertEqual(ET.tostring(sheet), sheet_bytes)  # not modified, including static content shared with labels
+        self.assertIsNone(compacted.find(f"{SODIPODI_NAMESPACE}namedview"))
+        self.assertIsNotNone(compact(sheet, keep_namedview=True).find(f"{SODIPODI_NAMESPACE}namedview"))
+        self.assertIsNone(compacted.find(f"{SVG_NAMESPACE}metadata"))
+        for elt in compacted.iter():
+            for key, value in elt.attrib.items():
+                self.assertFalse(key.startswith(INKSCAPE_NAMESPACE), f"{key} not removed")
+                self.assertTrue(not key.startswith(SODIPODI_NAMESPACE) or key == f"{SODIPODI_NAMESPACE}role")
+                if key in ["x", "y", "width", "height"]:
+                    self.assertNotRegex(value, r"\.\d\d\d")
+
+        def graphics_tags(elt: ET.Element) -> List[str]:
+            return sorted(
+                child.tag
+                for child in elt.iter()
+                if child.tag.startswith(SVG_NAMESPACE) and child.tag != f"{SVG_NAMESPACE}metadata"
+            )
+
+        self.assertEqual(graphics_tags(compacted), graphics_tags(sheet))  # only editor data is removed
+
+        original_namespaces = dict(ET._namespace_map)
+        self.addCleanup(lambda: (ET._namespace_map.clear(), ET._namespace_map.update(original_namespaces)))
+        register_namespaces()
+        compacted_bytes = ET.tostring(compacted)
+        self.assertTrue(compacted_bytes.startswith(b'<svg xmlns="http://www.w3.org/2000/svg"'))
+        self.assertNotIn(b"ns0:", compacted_bytes)
+        self.assertLess(len(compacted_bytes), len(sheet_bytes))
+
+    def test_compact_numbers(self) -> None:
+        path = ET.Element(
+            f"{SVG_NAMESPACE}path",
+            {"d": "M1.23456.5-2.0001e2 3,4", "transform": "translate(12.3456, -0.0001) scale(0.264583333)"},
+        )
+        self.assertEqual(
+            compact(path, precision=2).attrib,
+            {"d": "M1.23 0.5-200.01 3,4", "transform": "translate(12.35, 0) scale(0.264583)"},
+        )
@@ -0,0 +1,74 @@
+import os.path
+import shutil
+import threading
+import time
+import unittest
+from typing import List
+
+from pysvglabel.printer.PrintPipeline import PrintPipeline
+
+
+class PrintPipelineTestCase(unittest.TestCase):
+    def test_pipeline(self) -> None:
+        events: List[str] = []
+        lock = threading.Lock()
+
+        def render(payload: str, svg_filename: str) -> None:
+            if payload == "bad":
+                raise ValueError("bad row")
+            with open(svg_filename, "w") as file:
+                file.write(payload)
+            with lock:
+                events.append(f"render {payload}")
+
+        def convert(svg_filename: str, pdf_filename: str) -> None:
+            shutil.copy(svg_filename, pdf_filename)
+
+        def print_file(pdf_filename: str) -> None:
+            with open(pdf_filename) as file:
+                payload = file.read()
+            with lock:
+                events.append(f"print start {payload}")
+            time.sleep(0.1)
+            with lock:
+                events.append(f"print end {payload}")
+
+        with self.assertLogs("pysvglabel.printer.PrintPipeline", "INFO"):
+            with PrintPipeline(render, convert, print_file) as pipeline:
+                work_dir = pipeline.work_dir
+                for payload in ["a", "bad", "b", "c"]:
+                    pipeline.submit(payload, payload)
+
+        self.assertEqual(
+            [event for event in events if event.startswith("print end")], ["print end a", "print end b", "print end c"]
+        )
+        # later labels are rendered while earlier ones print
+        self.assertLess(events.index("render c"), events.index("print end a"))
+        self.assertFalse(os.path.exists(work_dir))  # artifacts are cleaned up
+
+    def test_failure_cleanup(self) -> None:
+        printed = threading.Event()
+
+        def render(payload: str, svg_filename: str) -> None:
+            with open(svg_filename, "w") as file:
+                file.write(payload)
+
+        def convert(svg_filename: str, pdf_filename: str) -> None:
+            with open(pdf_filename, "w") as file:  # partially written output
+                file.write("partial")
+            with open(svg_filename) as file:
+                if file.read() == "bad":
+                    raise ValueError("bad conversion")
+
+        def print_file(pdf_filename: str) -> None:
+            printed.set()
+
+        with self.assertLogs("pysvglabel.printer.PrintPipeline", "INFO"):
+            with PrintPipeline(render, convert, print_file) as pipeline:
+                pipeline.submit("bad", "bad")
+                pipeline.submit("ok", "ok")
+                self.assertTrue(printed.wait(10))  # jobs complete in order, so the failed job was dropped
+                deadline = time.monotonic() + 10
+                while os.listdir(pipeline.work_dir) and time.monotonic() < deadline:  # files are removed after print
+                    time.sleep(0.01)
+                self.assertEqual(os.listdir(pipeline.work_dir), [])
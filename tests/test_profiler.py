@@ -0,0 +1,48 @@
+import csv
+
+import os.path
+from pysvglabel.labelcore import SvgTemplate, Profiler, context_profiler, profile_phase
+from .LabelTestCase import LabelTestCase
+
+
+class ProfilerTestCase(LabelTestCase):
+    def test_disabled(self) -> None:
+        self.assertIs(profile_phase("a"), profile_phase("b", "detail"))  # shared, nothing is allocated
+        with profile_phase("a"):
+            pass
+
+    def test_profile_barcode(self) -> None:
+        with open(os.path.join(self.get_base_dir(), "test_simple.csv"), newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            table = [row for row in reader]
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "test_barcode.svg"))
+
+        profiler = Profiler()
+        with context_profiler(profiler):
+            template.apply_page(table)
+        template.apply_page(table)  # not recorded outside the context
+
+        summary = profiler.summary()
+        self.assertEqual(summary["template.row_block"]["count"], len(table))
+        self.assertEqual(summary["instance.copy"]["count"], len(table))
+        self.assertEqual(summary["group_replacer.Code128"]["count"], len(table))
+        self.assertEqual(summary["group_replacer.DataMatrix"]["count"], 3 * len(table))
+        self.assertEqual(summary["group_replacer.QrCode"]["count"], 3 * len(table))
+        for stats in summary.values():
+            self.assertLessEqual(stats["p50"], stats["p90"])
+            self.assertLessEqual(stats["p90"], stats["p99"])
+            self.assertLessEqual(stats["p99"], stats["max"])
+            self.assertAlmostEqual(stats["mean"] * stats["count"], stats["total"])
+        totals = [stats["total"] for stats in summary.values()]
+        self.assertEqual(totals, sorted(totals, reverse=True))
+
+    def test_profile_threads(self) -> None:
+        with open(os.path.join(self.get_base_dir(), "test_simple.csv"), newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            table = [row for row in reader]
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "test_barcode.svg"))
+
+        profiler = Profiler()
+        with context_profiler(profiler):  # the context is copied into pool threads
+            template.apply_page(table, workers=2)
+        self.assertEqual(profiler.summary()["group_replacer.Code128"]["count"], len(table))
@@ -0,0 +1,56 @@
+import csv
+
+import os.path
+import xml.etree.ElementTree as ET
+from typing import List
+from pysvglabel.labelcore import SvgTemplate, SharedDefs, context_shared_defs, NAMESPACES
+from pysvglabel.labelcore.common import XLINK_NAMESPACE
+from .LabelTestCase import LabelTestCase
+
+
+class SharedDefsTestCase(LabelTestCase):
+    def test_shared_defs(self) -> None:
+        with open(os.path.join(self.get_base_dir(), "test_simple.csv"), newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            table = [row for row in reader]
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "test_barcode.svg"))
+
+        single_defs = SharedDefs()
+        with context_shared_defs(single_defs):
+            single_page = template.apply_page(table[:1])
+        defs = SharedDefs()
+        with context_shared_defs(defs):
+            page = template.apply_page(table[:1] * 4)  # repeated rows should share their barcodes
+        sheet = template.create_sheet()
+        sheet.append(page)
+        sheet.append(defs.to_element())
+        self.write_label(sheet)
+
+        def def_uses(page: ET.Element) -> List[str]:
+            return [
+                use.attrib[f"{XLINK_NAMESPACE}href"][1:]
+                for use in page.findall(".//svg:use", NAMESPACES)
+                if use.attrib.get(f"{XLINK_NAMESPACE}href", "").startswith("#pysvglabel-")
+            ]
+
+        self.assertEqual(defs.fragments.keys(), single_defs.fragments.keys())
+        self.assertEqual(len(def_uses(page)), 4 * len(def_uses(single_page)))
+        self.assertEqual(set(def_uses(page)), set(defs.fragments.keys()))
+
+        # without a collector, content is inlined as before
+        self.assertNotIn(b"pysvglabel-", ET.tostring(template.apply_page(table[:1])))
+
+    def test_shared_defs_threaded(self) -> None:
+        with open(os.path.join(self.get_base_dir(), "test_subsvg.csv"), newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            table = [row for row in reader]
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "test_subsvg.svg"))
+
+        serial_defs = SharedDefs()
+        with context_shared_defs(serial_defs):
+            serial_page = template.apply_page(table)
+        threaded_defs = SharedDefs()
+        with context_shared_defs(threaded_defs):
+            threaded_page = template.apply_page(table, workers=4)
+        self.assertEqual(ET.tostring(serial_page), ET.tostring(threaded_page))  # ids are content-derived
+        self.assertEqual(serial_defs.fragments.keys(), threaded_defs.fragments.keys())
@@ -1,7 +1,11 @@
 import csv
 
 import os.path
-from pysvglabel.labelcore import SvgTemplate, NAMESPACES
+import tempfile
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator
+from pysvglabel.labelcore import SvgTemplate, NAMESPACES, BadTemplateException
+from pysvglabel.labelfrontend import LabelSheet, mm
 from pysvglabel.labelcore.SvgTemplate import get_text_of
 from .LabelTestCase import LabelTestCase
 
@@ -26,3 +30,133 @@ class SimpleLabelTestCase(LabelTestCase):
         self.assertEqual(get_text_of(groups[2][0].find("svg:flowRoot", NAMESPACES)), "B022 = two, 4c")  # type: ignore
         self.assertEqual(get_text_of(groups[3][0].find("svg:flowRoot", NAMESPACES)), "B033 = three, 6d")  # type: ignore
         self.assertEqual(get_text_of(groups[4][0].find("svg:flowRoot", NAMESPACES)), "B044 = four, 8e")  # type: ignore
+
+    def test_static_shared(self) -> None:
+        with open(os.path.join(self.get_base_dir(), "test_simple.csv"), newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            table = [row for row in reader]
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "simple_1.75x0.5.svg"))
+
+        groups = list(template.apply_page(table, share_static=True))
+
+        # static elements (here, the empty text) are shared between labels, while dynamic elements are copied
+        self.assertIs(groups[0][0].find("svg:text", NAMESPACES), groups[1][0].find("svg:text", NAMESPACES))
+        self.assertIsNot(groups[0][0].find("svg:flowRoot", NAMESPACES), groups[1][0].find("svg:flowRoot", NAMESPACES))
+
+    def test_labels_independent(self) -> None:
+        with open(os.path.join(self.get_base_dir(), "test_simple.csv"), newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            table = [row for row in reader]
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "simple_1.75x0.5.svg"))
+        expected = ET.tostring(template.apply_page(table[1:2]))
+
+        # by default, labels don't share content, so they can be modified in place
+        groups = list(template.apply_page(table))
+        for elt in groups[0].iter():
+            elt.attrib.clear()
+            elt.text = "modified"
+        self.assertIsNot(groups[0][0].find("svg:text", NAMESPACES), groups[1][0].find("svg:text", NAMESPACES))
+        self.assertNotIn(b"modified", ET.tostring(groups[1]))
+        self.assertEqual(ET.tostring(template.apply_page(table[1:2])), expected)
+
+    def test_resolve_path(self) -> None:
+        with open(os.path.join(self.get_base_dir(), "test_simple.csv"), newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            table = [row for row in reader]
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "simple_1.75x0.5.svg"))
+        exec("headers = []", template.env)
+        template.row_codes.append(  # relative to the template, regardless of the cwd
+            compile(
+                "with open(resolve_path('test_simple.csv')) as f:\n  headers.append(f.readline())", "<test row>", "exec"
+            )
+        )
+
+        original_cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.chdir(temp_dir)
+            try:
+                template.apply_page(table[:2], workers=2)
+            finally:
+                os.chdir(original_cwd)
+        with open(os.path.join(self.get_base_dir(), "test_simple.csv")) as f:
+            self.assertEqual(template.env["headers"], [f.readline()] * 2)
+
+    def test_row_scope(self) -> None:
+        with open(os.path.join(self.get_base_dir(), "test_simple.csv"), newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            table = [row for row in reader]
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "simple_1.75x0.5.svg"))
+        exec("count = 0\nseen = []\ndef bump():\n  global count\n  count += 1\n  return count", template.env)
+        template.row_codes.append(
+            compile(
+                "import math\n"
+                + "len = None\n"  # shadows the builtin in this row only
+                + "seen.append((id, bump(), [math.floor(float(id)) for _ in range(1)], 'spaced thing' in globals()))",
+                "<test row>",
+                "exec",
+            )
+        )
+        for row_num, row in enumerate(table[:3]):
+            template.apply_instance(row, table, row_num)
+
+        # init block variables changed by init block functions are seen by later rows, but row variables are not kept
+        self.assertEqual(template.env["seen"], [("0", 1, [0], False), ("1", 2, [1], False), ("2", 3, [2], False)])
+        self.assertEqual(template.env["count"], 3)
+        self.assertNotIn("math", template.env)
+        self.assertIs(template.env["len"], len)
+
+    def test_iter_pages(self) -> None:
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "simple_1.25x1.0.svg"))  # one label per page
+        rows_read = 0
+
+        def read_rows() -> Iterator[Dict[str, str]]:
+            nonlocal rows_read
+            with open(os.path.join(self.get_base_dir(), "test_simple.csv"), newline="") as csvfile:
+                for row in csv.DictReader(csvfile):
+                    rows_read += 1
+                    yield row
+
+        pages = template.iter_pages(read_rows())
+        self.assertEqual(rows_read, 0)
+        sheet = next(pages)
+        self.assertEqual(rows_read, 1)  # rows are only consumed as pages are generated
+        self.assertEqual(get_text_of(sheet.find(".//svg:flowRoot", NAMESPACES)), "B000 = zeroa")  # type: ignore
+
+        self.assertEqual(len(list(pages)), 4)
+        self.assertEqual(rows_read, 5)
+
+    def test_start_slot(self) -> None:
+        with open(os.path.join(self.get_base_dir(), "test_simple.csv"), newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            table = [row for row in reader]
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "simple_1.75x0.5.svg"))
+
+        full_groups = template.apply_page(table).findall("svg:g", NAMESPACES)
+        groups = template.apply_page(table[:2], start_slot=3).findall("svg:g", NAMESPACES)
+        self.assertEqual(len(groups), 2)
+        self.assertEqual(groups[0].attrib["transform"], full_groups[3].attrib["transform"])
+        self.assertEqual(groups[1].attrib["transform"], full_groups[4].attrib["transform"])
+        self.assertEqual(get_text_of(groups[0][0].find("svg:flowRoot", NAMESPACES)), "B000 = zero, 0a")  # type: ignore
+
+        labels_per_sheet = template.sheet.labels_per_sheet()
+        with self.assertRaises(BadTemplateException):
+            template.apply_page(table[:2], start_slot=labels_per_sheet - 1)
+
+        page_tables = list(template.iter_page_tables(table * labels_per_sheet, start_slot=labels_per_sheet - 2))
+        self.assertEqual(len(page_tables[0]), 2)  # only the first page is partial
+        self.assertEqual(len(page_tables[1]), labels_per_sheet)
+
+    def test_slot_positions(self) -> None:
+        page = (100, 100) * mm
+        space = (0, 0) * mm
+        self.assertEqual(
+            LabelSheet(page, space, (2, 3)).slot_positions(), ((0, 0), (1, 0), (0, 1), (1, 1), (0, 2), (1, 2))
+        )
+        self.assertEqual(
+            LabelSheet(page, space, (2, 3), vertical=True).slot_positions(),
+            ((0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (1, 2)),
+        )
+        self.assertEqual(
+            LabelSheet(page, space, (2, 3), flip_x=True).slot_positions(),
+            ((1, 0), (0, 0), (1, 1), (0, 1), (1, 2), (0, 2)),
+        )
@@ -0,0 +1,65 @@
+import csv
+import io
+
+import os.path
+import re
+import xml.etree.ElementTree as ET
+from pysvglabel.labelcore import SvgTemplate
+from pysvglabel.labelcore.SvgStreamWriter import SvgStreamWriter, serialize_fragment
+from .LabelTestCase import LabelTestCase
+
+
+class StreamWriterTestCase(LabelTestCase):
+    def test_stream(self) -> None:
+        with open(os.path.join(self.get_base_dir(), "test_simple.csv"), newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            table = [row for row in reader]
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "simple_1.75x0.5.svg"))
+
+        file = io.BytesIO()
+        with SvgStreamWriter(file, template.create_sheet()) as writer:
+            writer.start_group()
+            for label in template.iter_labels(table):
+                writer.write(label)
+            writer.end_group()
+
+        # streamed output should be equivalent to the fully built document, modulo namespace declarations
+        self.assertEqual(
+            ET.canonicalize(file.getvalue().decode("utf-8")),
+            ET.canonicalize(ET.tostring(self.create_sheet(template, table), encoding="unicode")),
+        )
+
+    def test_namespaces(self) -> None:
+        # labels include subtemplate SVGs, with metadata in namespaces not used elsewhere
+        with open(os.path.join(self.get_base_dir(), "test_subsvg.csv"), newline="") as csvfile:
+            table = list(csv.DictReader(csvfile))
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "test_subsvg.svg"))
+        sheet = self.create_sheet(template, table)
+        built = io.BytesIO()
+        ET.ElementTree(sheet).write(built)
+
+        for prerendered in [False, True]:
+            file = io.BytesIO()
+            with SvgStreamWriter(file, template.create_sheet()) as writer:
+                writer.start_group()
+                for label in template.iter_labels(table):
+                    if prerendered:  # as from generate worker processes
+                        writer.write_bytes(serialize_fragment(label, writer.prefixes))
+                    else:
+                        writer.write(label)
+                writer.end_group()
+            output = file.getvalue()
+
+            self.assertEqual(ET.canonicalize(output.decode("utf-8")), ET.canonicalize(built.getvalue().decode("utf-8")))
+            self.assertLessEqual(len(output), len(built.getvalue()))
+            declared = re.findall(rb'xmlns(?::\w+)?="([^"]*)"', output)  # namespace uris
+            self.assertEqual(len(declared), len(set(declared)))
+
+    def test_undeclared_namespace(self) -> None:
+        # namespaces not declared on the top-level element are declared on the fragments using them
+        file = io.BytesIO()
+        with SvgStreamWriter(file, ET.Element("{http://www.w3.org/2000/svg}svg")) as writer:
+            for i in range(2):
+                writer.write(ET.Element("{http://www.w3.org/2000/svg}g", {"{urn:pysvglabel-test}index": str(i)}))
+        root = ET.fromstring(file.getvalue())
+        self.assertEqual([elt.get("{urn:pysvglabel-test}index") for elt in root], ["0", "1"])
@@ -1,7 +1,11 @@
 import csv
 
+import os
 import os.path
-from pysvglabel.labelcore import SvgTemplate, NAMESPACES
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+from pysvglabel.labelcore import SvgTemplate, SvgCache, svg_cache, NAMESPACES
 from .LabelTestCase import LabelTestCase
 
 
@@ -17,3 +21,50 @@ class SubSvgTestCase(LabelTestCase):
 
         groups = sheet.findall("svg:g", NAMESPACES)[0].findall("svg:g", NAMESPACES)
         self.assertEqual(len(groups), 5)
+
+    def test_subsvg_threaded(self) -> None:
+        with open(os.path.join(self.get_base_dir(), "test_subsvg.csv"), newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            table = [row for row in reader]
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "test_subsvg.svg"))
+
+        cwd = os.getcwd()
+        page = template.apply_page(table, workers=4)
+        self.assertEqual(os.getcwd(), cwd)  # rendering must not touch the os cwd
+        self.assertEqual(ET.tostring(page), ET.tostring(template.apply_page(table)))
+
+    def test_svg_cache(self) -> None:
+        with open(os.path.join(self.get_base_dir(), "test_subsvg.csv"), newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            table = [row for row in reader]
+        template = SvgTemplate(os.path.join(self.get_base_dir(), "test_subsvg.svg"))
+
+        svg_cache.clear()
+        self.assertEqual(ET.tostring(template.apply_page(table)), ET.tostring(template.apply_page(table)))
+        stats = svg_cache.stats()
+        self.assertEqual(stats["misses"], stats["entries"])  # each distinct file is only parsed once
+        self.assertGreater(stats["hits"], 0)
+
+    def test_svg_cache_modified(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "sub.svg")
+            shutil.copy(os.path.join(self.get_base_dir(), "sub_rect.svg"), filename)
+            cache = SvgCache(max_entries=1)
+            self.assertIsNot(cache.get(filename), cache.get(filename))  # copies are handed out
+            self.assertEqual(cache.stats()["misses"], 1)
+
+            os.utime(filename, ns=(0, 0))  # modified files are re-parsed
+            cache.get(filename)
+            self.assertEqual(cache.stats()["misses"], 2)
+            self.assertEqual(cache.stats()["entries"], 1)
+
+    def test_svg_cache_template(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "sub.svg")
+            shutil.copy(os.path.join(self.get_base_dir(), "sub_temp.svg"), filename)
+            cache = SvgCache()
+            template = cache.get_template(filename)
+            self.assertIs(cache.get_template(filename), template)  # compiled once, shared between rows
+
+            os.utime(filename, ns=(0, 0))  # modified files are recompiled
+            self.assertIsNot(cache.get_template(filename), template)
@@ -24,6 +24,11 @@ class UnitsParseTestCase(unittest.TestCase):
         self.assertEqual(parsed.value, 256)
         self.assertEqual(parsed.unit, px)
 
+    def test_units_parse_cached(self) -> None:
+        parsed = LengthDimension.from_str("2.5 mm")
+        self.assertIs(LengthDimension.from_str("2.5 mm"), parsed)
+        self.assertEqual(parsed.to_px(), 2.5 * 96 / 25.4)
+
 
 class UnitsOpsTestCase(unittest.TestCase):
     def test_add(self) -> None: